@@ -1,158 +1,195 @@
 import os
-import re
+import sys
 import json
-import math
-from espn_api.football import League
+import argparse
+import instrument
 from pathlib import Path
-from datetime import datetime
+from simulate import project_standings
+from espn_client import make_session
+from pipeline import LeagueStandings
+from metrics import start_metrics
+from publish import (
+    standings_views, write_views, canonical_json, published_rows, content_hash, published_hash, write_manifest,
+    set_job_output
+)
 
 # --- CONFIG ---
 LEAGUE_ID = 487404
 YEAR = 2025
 OUTPUT_FILE = Path("LeagueData.json")
-
-# Get credentials from environment
-SWID, ESPN_S2 = os.getenv("SWID"), os.getenv("ESPN_S2")
-
-if not SWID or not ESPN_S2:
-    raise ValueError("Missing SWID or ESPN_S2 environment variables")
-
-# Connect to league
-league = League(league_id=LEAGUE_ID, year=YEAR, swid=SWID, espn_s2=ESPN_S2)
-
-
-# --- Helpers ---
-def normalize_name(name: str) -> str:
-    return re.sub(r'[^a-z0-9]', '', (name or "").lower().strip())
-
-def record_to_list(s: str) -> list[int]:
-    nums = [int(n) for n in re.findall(r'\d+', str(s))]
-    return (nums + [0, 0, 0])[:3]
-
-def list_to_record(lst: list[int]) -> str:
-    return "-".join(map(str, lst))
-
-def to_float(v) -> float:
+PROJECTION_FILE = Path("LeagueData_projection.json")
+AUDIT_FILE = Path("LeagueData_audit.json")
+
+# Manual adjustments overlaid on ESPN's numbers, applied in week order (see standings.Overlay):
+# the Week 1 results file plus every *.json in the adjustments directory
+ADJUSTMENTS = (Path("week_1_2025_results.json"), Path("adjustments"))
+
+# Box score fetching: weeks fetched in parallel, and per-week retry/backoff (seconds)
+FETCH_WORKERS = 6
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 1.0
+
+# One pooled keep-alive session serves every ESPN request; HTTP/2 needs httpx[http2]
+HTTP2 = False
+
+# Tools serving several leagues (batch.py, live.py, service.py) share one rate limit:
+# ESPN requests per second across all leagues, and the burst allowed above it
+RATE_LIMIT = 10.0
+RATE_BURST = 10
+
+# Ranking tiebreak chain, applied in order (see standings.TIEBREAKERS):
+# "wins", "pf", "h2h", "median_wins"
+TIEBREAKS = ("wins", "pf")
+
+# Monte Carlo playoff odds: number of simulated seasons and RNG seed (None = random).
+# Fixed, so unchanged standings give unchanged odds and the output hash stays put
+SIM_COUNT = 100_000
+SIM_SEED = 0
+
+# Final-standings projector (--project): simulations, seed and worker processes
+PROJECTION_COUNT = 100_000
+PROJECTION_SEED = 0
+PROJECTION_WORKERS = os.cpu_count() or 1
+
+# Finalized weeks' scores (the score store) and the status fingerprint are kept here
+CACHE_DIR = Path(".cache")
+
+# Per-stage timings, request latencies and cache hit rates of every run;
+# --profile additionally writes run_profile.prof (cProfile) or run_profile.html (pyinstrument)
+REPORT_FILE = Path("run_report.json")
+PROFILE_STEM = Path("run_profile")
+
+# Prometheus metrics (needs prometheus-client): a local /metrics port and/or a file for
+# node_exporter's textfile collector. Both None = off, and the fetch hooks cost nothing
+METRICS_PORT = None
+METRICS_TEXTFILE = None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build LeagueData.json from the ESPN league.")
+    parser.add_argument("--full", action="store_true", help="rebuild every week from scratch instead of using saved state")
+    parser.add_argument("--verify", action="store_true", help="run both the incremental and full rebuild and diff them")
+    parser.add_argument("--record", type=Path, metavar="DIR", help="save every ESPN response as a replayable fixture")
+    parser.add_argument("--project", action="store_true", help=f"also write the final-standings distribution to {PROJECTION_FILE}")
+    parser.add_argument("--workers", type=int, default=PROJECTION_WORKERS, help="worker processes for --project")
+    parser.add_argument("--seed", type=int, default=PROJECTION_SEED, help="random seed for --project")
+    parser.add_argument("--force", action="store_true", help="write the outputs even if they match the last published ones")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=("cprofile", "pyinstrument"),
+                        help=f"profile the run and write {PROFILE_STEM}.prof (or .html for pyinstrument)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="serve Prometheus metrics on this local port")
+    parser.add_argument("--metrics-textfile", type=Path, default=METRICS_TEXTFILE,
+                        help="write Prometheus metrics here for a textfile collector")
+    return parser.parse_args(argv)
+
+
+def configured_league() -> dict:
+    """The league configured above as a batch.py-style entry, credentials from the environment."""
+    return {
+        "league_id": LEAGUE_ID, "year": YEAR, "swid": os.getenv("SWID"), "espn_s2": os.getenv("ESPN_S2"),
+        "adjustments": [p for p in ADJUSTMENTS if p.exists()],
+    }
+
+
+def make_standings(entry: dict, session=None, rate_limiter=None, cache_dir: Path = CACHE_DIR,
+                   **connect_kwargs) -> LeagueStandings:
+    """
+    A league's pipeline from a batch.py-style entry and the settings above; every tool
+    builds its pipelines here. Tools serving several leagues pass one session and one
+    RateLimiter for all of them. ESPN_BASE_URL points at a stand-in (see espn_standin.py).
+    """
+    connect_kwargs.setdefault("base_url", os.getenv("ESPN_BASE_URL"))
+    return LeagueStandings(
+        entry["league_id"], entry["year"], entry.get("swid"), entry.get("espn_s2"), cache_dir=cache_dir,
+        tiebreaks=TIEBREAKS, adjustments=entry.get("adjustments", ()),
+        retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, fetch_workers=FETCH_WORKERS,
+        session=session, rate_limiter=rate_limiter, **connect_kwargs
+    )
+
+
+def league_standings(record_dir: Path = None) -> LeagueStandings:
+    """The configured league's pipeline; nothing is fetched until it is first used."""
+    entry = configured_league()
+    if not os.getenv("ESPN_BASE_URL") and (not entry["swid"] or not entry["espn_s2"]):
+        raise ValueError("Missing SWID or ESPN_S2 environment variables")
+    return make_standings(entry, make_session(FETCH_WORKERS, HTTP2), record_dir=record_dir)
+
+
+def write_projection(league, projection: dict, path: Path = PROJECTION_FILE):
+    with open(path, "w") as f:
+        json.dump([
+            {"Team": t.team_name, "Records": p["records"], "Seeds": p["seeds"], "PF": p["pf"]}
+            for t, p in ((t, projection[t.team_id]) for t in league.teams)
+        ], f, indent=2)
+    print(f"Projection written to {path}")
+
+
+def run(args, pipeline: LeagueStandings):
+    # Taken before building and saved with the output, so an ESPN change made while
+    # building is still seen as new next run
+    fingerprint = pipeline.fingerprint() if pipeline.cache_dir is not None else None
+
+    # One small status request; if nothing changed since the last published run, stop here
+    if not (args.full or args.verify or args.force or args.record or args.project) and pipeline.unchanged():
+        set_job_output("changed", "false")
+        print("[OK] Nothing changed on ESPN since the last run, skipping")
+        return
+
+    if args.verify:
+        with instrument.stage("verify"):
+            diff = pipeline.verify()
+        if diff:
+            print("\n".join(diff))
+            sys.exit("[ERROR] Incremental standings differ from full rebuild")
+        print("[OK] Incremental standings match full rebuild")
+
+    with instrument.stage("standings"):
+        teams_data = pipeline.standings(args.full, SIM_COUNT, SIM_SEED)
+
+    if args.project:
+        with instrument.stage("project"):
+            write_projection(pipeline.league, project_standings(pipeline.season, PROJECTION_COUNT, args.seed, args.workers))
+
+    # --- Save ---
+    # Nothing is rewritten (so nothing is committed or redeployed) if the content is unchanged
+    # Sorted keys and rank order, so equal standings hash and write the same bytes
+    rows = published_rows(teams_data)
+    content = content_hash({"standings": rows, "audit": pipeline.audit})
+    if content == published_hash() and not args.force:
+        set_job_output("changed", "false")
+        pipeline.save_fingerprint(fingerprint)
+        print(f"[OK] Standings unchanged ({content[:12]}), nothing written")
+        return
+
+    with instrument.stage("save"):
+        with open(OUTPUT_FILE, "w") as f:
+            f.write(canonical_json(rows, indent=2))
+        with open(AUDIT_FILE, "w") as f:
+            f.write(canonical_json(pipeline.audit, indent=2))
+        views = write_views(standings_views(rows))
+        write_manifest(content, [OUTPUT_FILE, AUDIT_FILE, *views])
+    set_job_output("changed", "true")
+    pipeline.save_fingerprint(fingerprint)
+
+    print(f"Data written to {OUTPUT_FILE}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pipeline = league_standings(args.record)
+
+    # The report (and metrics textfile) is written on every exit, skips and failures included
+    exporter = start_metrics(args.metrics_port, args.metrics_textfile)
+    report = instrument.start()
     try:
-        return float(v)
-    except Exception:
-        return 0.0
-
-
-# --- Median W/L Record ---
-def get_median_records(l: League) -> dict:
-    # """Calculate win/loss vs median score each week (from week 2 onward)."""
-    median_records = {t.team_id: {"wins": 0, "losses": 0} for t in l.teams}
-    max_week = min(l.current_week + 1, 14)
-
-    for week in range(2, max_week):
-        try:
-            box_scores = l.box_scores(week)
-        except KeyError:
-            continue
-
-        scores = [s for b in box_scores for s in (b.home_score, b.away_score) if s is not None]
-
-        # Skip if no scores OR all scores are 0 (season not started or week unplayed)
-        if not scores or all(s == 0 for s in scores):
-            continue
-
-        scores.sort()
-        mid = len(scores) // 2
-        median = (scores[mid - 1] + scores[mid]) / 2 if len(scores) % 2 == 0 else scores[mid]
-
-        for b in box_scores:
-            for team, score in [(b.home_team, b.home_score), (b.away_team, b.away_score)]:
-                if team is None or score is None:
-                    continue
-                key = "wins" if score >= median else "losses"
-                median_records[team.team_id][key] += 1
-
-    return median_records
-
-
-
-median_records = get_median_records(league)
-
-# --- Collect Team Data ---
-first_place_wins = max(t.wins for t in league.teams)
-teams_data = []
-
-for t in league.teams:
-    wl_record = f"{t.wins}-{t.losses}-{t.ties}"
-    median_record = median_records[t.team_id]
-    median_str = f"{median_record['wins']}-{median_record['losses']}-0"
-
-    overall = [a + b for a, b in zip(record_to_list(wl_record), record_to_list(median_str))]
-
-    teams_data.append({
-        "Rank": t.standing,
-        "Team": t.team_name,
-        "Overall Record": list_to_record(overall),
-        "Matchup Record": wl_record,
-        "Median Score Record": median_str,
-        "GB": "-" if t.wins == first_place_wins else first_place_wins - t.wins,
-        "PF": round(t.points_for, 2),
-        "PA": round(t.points_against, 2),
-        "Acquisition Budget": 100 - t.acquisition_budget_spent,
-        "Team Logo": t.logo_url
-        # Win % calculated later
-    })
-
-
-# --- Merge Week 1 Results ---
-with open("week_1_2025_results.json") as f:
-    week1_lookup = {normalize_name(d["Team"]): d for d in json.load(f)}
-
-for team in teams_data:
-    norm_name = normalize_name(team["Team"])
-    wk = week1_lookup.get(norm_name)
-
-    if not wk:
-        print(f"[WARN] No Week 1 match for: {team['Team']} (normalized: {norm_name})")
-        continue
-
-    for field in ("Overall Record", "Matchup Record", "Median Score Record"):
-        combined = [
-            a + b for a, b in zip(
-                record_to_list(team[field]),
-                record_to_list(wk.get(field, "0-0-0"))
-            )
-        ]
-        team[field] = list_to_record(combined)
-
-    # PF / PA merge
-    team["PF"] = round(to_float(team["PF"]) + to_float(wk.get("PF", 0)), 2)
-    team["PA"] = round(to_float(team["PA"]) + to_float(wk.get("PA", 0)), 2)
-
-
-# --- Calculate Win % ---
-for team in teams_data:
-    w, l, ti = record_to_list(team["Overall Record"])
-    total = w + l + ti
-    team["Win %"] = round((w + 0.5 * ti) / total, 2) if total else 0.0
-
-
-# --- Recompute Leader & GB ---
-leader = max(
-    teams_data,
-    key=lambda x: (record_to_list(x["Overall Record"])[0], x["PF"], -record_to_list(x["Overall Record"])[1])
-)
-lw, ll, _ = record_to_list(leader["Overall Record"])
-
-for t in teams_data:
-    w, l, _ = record_to_list(t["Overall Record"])
-    t["GB"] = 0 if t is leader else round(((lw - w) + (l - ll)) / 2, 1)
-
-
-# --- Re-Rank Teams ---
-teams_sorted = sorted(teams_data, key=lambda x: (record_to_list(x["Overall Record"])[0], x["PF"]), reverse=True)
-for i, t in enumerate(teams_sorted, 1):
-    next(team for team in teams_data if normalize_name(team["Team"]) == normalize_name(t["Team"]))["Rank"] = i
-
-
-# --- Save ---
-with open(OUTPUT_FILE, "w") as f:
-    json.dump(teams_data, f, indent=2)
-
-print(f"Data written to {OUTPUT_FILE}")
+        with instrument.profiled(args.profile, PROFILE_STEM):
+            run(args, pipeline)
+    finally:
+        instrument.stop()
+        report.write(REPORT_FILE)
+        print(f"Run report written to {REPORT_FILE}")
+        if exporter is not None and args.metrics_textfile:
+            exporter.write_textfile(args.metrics_textfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Build standings for many leagues in one run.
+
+    python batch.py leagues.json --out-dir leagues/ --concurrency 8 --rate 20
+
+leagues.json is a list of leagues, each with credentials given directly or as the
+names of environment variables holding them:
+
+    [
+      {"league_id": 487404, "year": 2025, "swid_env": "SWID", "espn_s2_env": "ESPN_S2",
+       "adjustments": ["week_1_2025_results.json", "adjustments/"]},
+      {"league_id": 123456, "year": 2025, "swid": "{...}", "espn_s2": "..."}
+    ]
+
+Leagues run concurrently on one shared HTTP session behind a global rate limiter.
+Each writes LeagueData_<league_id>_<year>.json plus compact per-view files in
+<league_id>_<year>/ (see publish.py); index.json lists every league with
+its status, and one league failing does not stop the others.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import instrument
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from espn_client import RateLimiter, make_session
+from metrics import start_metrics
+from publish import standings_views, write_views, canonical_json, published_rows
+from GetLeagueData import CACHE_DIR, FETCH_WORKERS, RATE_LIMIT, RATE_BURST, SIM_COUNT, SIM_SEED, make_standings
+
+
+# --- Config ---
+def load_leagues(path: Path) -> list:
+    with open(path) as f:
+        entries = json.load(f)
+    for entry in entries:
+        entry["swid"] = entry.get("swid") or os.getenv(entry.get("swid_env", ""), "") or None
+        entry["espn_s2"] = entry.get("espn_s2") or os.getenv(entry.get("espn_s2_env", ""), "") or None
+    return entries
+
+
+# --- Batch Run ---
+def process_league(entry: dict, out_dir: Path, session, rate_limiter, base_url: str = None,
+                   cache_dir: Path = CACHE_DIR, sim_count: int = SIM_COUNT) -> dict:
+    """Run the full pipeline for one league and write its output; never raises."""
+    league_id, year = entry["league_id"], entry["year"]
+    output = out_dir / f"LeagueData_{league_id}_{year}.json"
+    summary = {"league_id": league_id, "year": year}
+    start = time.perf_counter()
+
+    try:
+        pipeline = make_standings(entry, session, rate_limiter, cache_dir, base_url=base_url)
+        teams_data = pipeline.standings(sim_count=sim_count, sim_seed=SIM_SEED)
+        rows = published_rows(teams_data)
+        with open(output, "w") as f:
+            f.write(canonical_json(rows, indent=2))
+        write_views(standings_views(rows), out_dir / f"{league_id}_{year}")
+        summary.update(status="ok", file=output.name, name=pipeline.league.settings.name, teams=len(teams_data))
+    except Exception as e:
+        print(f"[WARN] League {league_id} ({year}) failed: {e}")
+        summary.update(status="error", error=f"{type(e).__name__}: {e}")
+
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    instrument.count(f"league.{summary['status']}")
+    return summary
+
+
+def run_batch(entries: list, out_dir: Path, concurrency: int = 4, rate: float = RATE_LIMIT, burst: int = RATE_BURST,
+              base_url: str = None, sim_count: int = SIM_COUNT, http2: bool = False) -> dict:
+    """Process every league with at most `concurrency` in flight; returns the aggregate index."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = make_session(concurrency * FETCH_WORKERS, http2)
+    rate_limiter = RateLimiter(rate, burst)
+    processed, lock = [0], threading.Lock()
+
+    def process(entry):
+        summary = process_league(entry, out_dir, session, rate_limiter, base_url, sim_count=sim_count)
+        with lock:
+            processed[0] += 1
+            instrument.gauge("leagues_processed", processed[0])
+        return summary
+
+    instrument.gauge("leagues_total", len(entries))
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        summaries = list(pool.map(process, entries))
+
+    index = {
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "leagues": summaries,
+    }
+    with open(out_dir / "index.json", "w") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Build standings for many ESPN leagues.")
+    parser.add_argument("leagues", type=Path, help="JSON list of leagues (see module docstring)")
+    parser.add_argument("--out-dir", type=Path, default=Path("leagues"))
+    parser.add_argument("--concurrency", type=int, default=4, help="leagues processed at once")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max ESPN requests per second across all leagues")
+    parser.add_argument("--burst", type=int, default=RATE_BURST, help="requests allowed in a burst above --rate")
+    parser.add_argument("--sims", type=int, default=SIM_COUNT, help="playoff odds simulations per league")
+    parser.add_argument("--http2", action="store_true", help="use HTTP/2 (needs httpx[http2])")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port (needs prometheus-client)")
+    parser.add_argument("--metrics-textfile", type=Path, help="write Prometheus metrics here for a textfile collector")
+    args = parser.parse_args()
+
+    exporter = start_metrics(args.metrics_port, args.metrics_textfile)
+    try:
+        index = run_batch(
+            load_leagues(args.leagues), args.out_dir, args.concurrency, args.rate, args.burst,
+            os.getenv("ESPN_BASE_URL"), args.sims, args.http2
+        )
+    finally:
+        if exporter is not None and args.metrics_textfile:
+            exporter.write_textfile(args.metrics_textfile)
+    failed = [s for s in index["leagues"] if s["status"] != "ok"]
+    print(f"{len(index['leagues']) - len(failed)} of {len(index['leagues'])} leagues written to {args.out_dir}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark the standings pipeline on synthetic in-memory leagues.
+
+    python benchmark.py --save bench_baseline.json
+    python benchmark.py --compare bench_baseline.json --threshold 0.25
+
+Each scenario (teams x weeks x leagues) is timed per stage, best of --repeat runs,
+with peak memory measured in a separate tracemalloc pass. --compare exits non-zero
+when any stage is slower than the baseline by more than --threshold.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from standings import (
+    get_median_records, collect_team_data, TeamIndex, load_overlays, apply_adjustments,
+    add_win_pct, add_games_back, rank_teams
+)
+
+TEAM_COUNTS = (8, 12, 20, 32)
+WEEK_COUNTS = (1, 6, 12, 18)
+LEAGUE_COUNTS = (1, 10, 100, 500)
+
+
+# --- Fake League ---
+class FakeTeam:
+    def __init__(self, team_id: int, rng: random.Random):
+        self.team_id = team_id
+        self.team_name = f"Team {team_id}"
+        self.wins = self.losses = self.ties = 0
+        self.points_for = self.points_against = 0.0
+        self.acquisition_budget_spent = rng.randint(0, 100)
+        self.logo_url = ""
+        self.standing = team_id
+        self.schedule, self.scores, self.outcomes = [], [], []
+
+
+class FakeBoxScore:
+    def __init__(self, home_team, away_team, home_score, away_score):
+        self.home_team, self.away_team = home_team, away_team
+        self.home_score, self.away_score = home_score, away_score
+
+
+class FakeSettings:
+    def __init__(self, reg_season: int):
+        self.reg_season_count = reg_season
+        self.matchup_periods = {str(p): [p] for p in range(1, 19)}
+
+
+class FakeLeague:
+    """In-memory stand-in for espn_api's League with a round-robin schedule and random scores."""
+
+    def __init__(self, league_id: int, teams: int, weeks: int, seed: int = 0, year: int = 2025):
+        rng = random.Random(seed * 1_000_003 + league_id)
+        self.league_id, self.year = league_id, year
+        self.current_week = weeks
+        self.settings = FakeSettings(max(weeks, 14))
+        self.teams = [FakeTeam(i, rng) for i in range(1, teams + 1)]
+        self.weeks = {}
+
+        for week in range(1, weeks + 1):
+            shift = (week - 1) % (teams - 1)
+            rotated = [self.teams[0]] + self.teams[1:][shift:] + self.teams[1:][:shift]
+            boxes = []
+            for home, away in zip(rotated[: teams // 2], reversed(rotated[teams // 2:])):
+                hs, aws = round(rng.gauss(115, 25), 2), round(rng.gauss(115, 25), 2)
+                boxes.append(FakeBoxScore(home, away, hs, aws))
+                home.schedule.append(away)
+                away.schedule.append(home)
+                home.scores.append(hs)
+                away.scores.append(aws)
+                final = week < weeks
+                home.outcomes.append(("W" if hs > aws else "L") if final else "U")
+                away.outcomes.append(("W" if aws > hs else "L") if final else "U")
+                if final:
+                    winner, loser = (home, away) if hs > aws else (away, home)
+                    winner.wins += 1
+                    loser.losses += 1
+                    home.points_for += hs
+                    away.points_for += aws
+                    home.points_against += aws
+                    away.points_against += hs
+            self.weeks[week] = boxes
+
+    def box_scores(self, week: int):
+        if week not in self.weeks:
+            raise KeyError(week)
+        return self.weeks[week]
+
+
+def write_week1_file(path: Path, teams: int):
+    rng = random.Random(teams)
+    with open(path, "w") as f:
+        json.dump([
+            {"Team": f"Team {i}", "Overall Record": "1-1-0", "Matchup Record": "1-0-0",
+             "Median Score Record": "0-1-0", "PF": round(rng.gauss(115, 25), 2), "PA": round(rng.gauss(115, 25), 2)}
+            for i in range(1, teams + 1)
+        ], f)
+
+
+# --- Stages ---
+# Each stage takes the per-league state dict and fills in what the next stage needs.
+# Inputs read from disk (the overlays) are loaded once up front, so no stage times file I/O.
+STAGES = (
+    ("median", lambda st: st.update(median_records=get_median_records(st["league"], max_workers=1))),
+    ("collect", lambda st: st.update(teams_data=collect_team_data(st["league"], st["median_records"]))),
+    ("adjustments", lambda st: apply_adjustments(
+        st["teams_data"], TeamIndex.from_league(st["league"]), st["overlays"]
+    )),
+    ("win_pct", lambda st: add_win_pct(st["teams_data"])),
+    ("games_back", lambda st: add_games_back(st["teams_data"])),
+    ("rank", lambda st: rank_teams(st["teams_data"])),
+)
+
+
+def time_stages(leagues: list, overlays: list) -> dict:
+    """Seconds per stage, summed over all leagues."""
+    totals = {name: 0.0 for name, _ in STAGES}
+    for l in leagues:
+        state = {"league": l, "overlays": overlays}
+        for name, stage in STAGES:
+            start = time.perf_counter()
+            stage(state)
+            totals[name] += time.perf_counter() - start
+    return totals
+
+
+def peak_memory(leagues: list, overlays: list) -> dict:
+    """Largest allocation peak (bytes above the stage's starting point) per stage."""
+    peaks = {name: 0 for name, _ in STAGES}
+    tracemalloc.start()
+    try:
+        for l in leagues:
+            state = {"league": l, "overlays": overlays}
+            for name, stage in STAGES:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                stage(state)
+                peaks[name] = max(peaks[name], tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench_scenario(teams: int, weeks: int, league_count: int, repeat: int, overlays: list) -> dict:
+    leagues = [FakeLeague(i, teams, weeks) for i in range(1, league_count + 1)]
+    runs = [time_stages(leagues, overlays) for _ in range(repeat)]
+    peaks = peak_memory(leagues, overlays)
+    return {
+        name: {"seconds": min(run[name] for run in runs), "peak_bytes": peaks[name]}
+        for name, _ in STAGES
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_seconds: float) -> list:
+    """Stages slower than baseline * (1 + threshold); stages under min_seconds are too noisy to judge."""
+    regressions = []
+    for scenario, stages in results.items():
+        for name, result in stages.items():
+            base = baseline.get(scenario, {}).get(name)
+            if not base or max(base["seconds"], result["seconds"]) < min_seconds:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + threshold):
+                regressions.append(
+                    f"{scenario} {name}: {result['seconds'] * 1000:.2f} ms vs baseline {base['seconds'] * 1000:.2f} ms"
+                )
+    return regressions
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the standings pipeline on synthetic leagues.")
+    parser.add_argument("--teams", type=int, nargs="+", default=TEAM_COUNTS)
+    parser.add_argument("--weeks", type=int, nargs="+", default=WEEK_COUNTS)
+    parser.add_argument("--leagues", type=int, nargs="+", default=LEAGUE_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scenario (best is kept)")
+    parser.add_argument("--save", type=Path, help="write results as a baseline JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--min-seconds", type=float, default=0.001, help="ignore stages faster than this")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for teams in args.teams:
+            week1_file = Path(tmp) / f"week1_{teams}.json"
+            write_week1_file(week1_file, teams)
+            overlays = load_overlays([week1_file])
+            for weeks in args.weeks:
+                for league_count in args.leagues:
+                    scenario = f"teams={teams} weeks={weeks} leagues={league_count}"
+                    results[scenario] = bench_scenario(teams, weeks, league_count, args.repeat, overlays)
+                    timings = "  ".join(
+                        f"{name} {r['seconds'] * 1000:.2f}ms/{r['peak_bytes'] / 1024:.0f}KiB"
+                        for name, r in results[scenario].items()
+                    )
+                    print(f"{scenario:<32} {timings}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print("\n".join(regressions))
+            sys.exit(f"[ERROR] {len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+        print(f"[OK] No stage regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
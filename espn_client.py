@@ -0,0 +1,243 @@
+import json
+import time
+import hashlib
+import threading
+import requests
+from pathlib import Path
+from urllib.parse import urlencode, parse_qsl
+from requests.adapters import HTTPAdapter
+import instrument
+from espn_api.football import League
+from espn_api.requests.constant import FANTASY_BASE_ENDPOINT
+from espn_api.requests.espn_requests import EspnFantasyRequests, ESPNAccessDenied, ESPNInvalidLeague, ESPNUnknownError
+
+try:
+    import httpx
+except ImportError:  # optional: only needed for HTTP/2 (pip install "httpx[http2]")
+    httpx = None
+
+# Connections kept open per host by the shared session
+DEFAULT_POOL_SIZE = 10
+
+
+# --- Fixture Keys ---
+def canonical_query(query) -> str:
+    """Order-independent query string, e.g. from a params dict or a raw URL query."""
+    pairs = parse_qsl(query) if isinstance(query, str) else parse_qsl(urlencode(query or {}, doseq=True))
+    return urlencode(sorted(pairs))
+
+
+def fixture_key(path: str, query, fantasy_filter: str = None) -> str:
+    """Key a recorded response by relative path, canonical query and x-fantasy-filter header."""
+    return f"{path.lstrip('/')}?{canonical_query(query)}#{fantasy_filter or ''}"
+
+
+def fixture_name(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()[:16] + ".json"
+
+
+def endpoint_label(url: str, params: dict = None) -> str:
+    """Short name for a request in run reports, e.g. "leagues?view=mMatchupScore+mScoreboard"."""
+    path = url.split("?")[0].rstrip("/")
+    kind = "leagues" if "/leagues/" in path or "/leagueHistory/" in path else path.rsplit("/", 1)[-1]
+    views = (params or {}).get("view")
+    if not views:
+        return kind
+    return f"{kind}?view=" + "+".join([views] if isinstance(views, str) else views)
+
+
+# --- Rate Limiting ---
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` requests per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate, self.burst = rate, burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- HTTP Sessions ---
+class Http2Session:
+    """requests.Session-like wrapper over an HTTP/2 httpx.Client (only what ClientRequests uses)."""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.Client(http2=True, limits=limits, timeout=30.0)
+
+    def get(self, url: str, params: dict = None, headers: dict = None, cookies: dict = None):
+        headers = dict(headers or {})
+        if cookies:
+            # Per-request cookies are deprecated in httpx; send them as a header instead
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        return self.client.get(url, params=params, headers=headers)
+
+    def close(self):
+        self.client.close()
+
+
+def make_session(pool_size: int = DEFAULT_POOL_SIZE, http2: bool = False):
+    """
+    Pooled keep-alive session: at most pool_size open connections per host, with
+    callers waiting for a free one rather than opening more. http2=True uses httpx
+    when it is installed and falls back to requests otherwise.
+    """
+    if http2:
+        if httpx is not None:
+            return Http2Session(pool_size)
+        print("[WARN] httpx is not installed, falling back to HTTP/1.1 keep-alive")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def default_session() -> requests.Session:
+    """Process-wide pooled session for ClientRequests created without one."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = make_session()
+        return _default_session
+
+
+# --- ESPN Requests ---
+class ClientRequests(EspnFantasyRequests):
+    """
+    espn_api's request layer with every HTTP call routed through _get().
+
+    base_url replaces ESPN's fantasy API root (e.g. a local stand-in server),
+    record_dir saves every response as a replayable fixture, session is a pooled
+    session from make_session() (default_session() if not given) and rate_limiter a
+    RateLimiter shared across leagues.
+    """
+
+    def __init__(self, *args, base_url: str = None, record_dir: Path = None,
+                 session: requests.Session = None, rate_limiter: RateLimiter = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session or default_session()
+        self.rate_limiter = rate_limiter
+        self.base_url = (base_url.rstrip("/") + "/") if base_url else FANTASY_BASE_ENDPOINT
+        if base_url:
+            self.ENDPOINT = self.ENDPOINT.replace(FANTASY_BASE_ENDPOINT, self.base_url)
+            self.LEAGUE_ENDPOINT = self.LEAGUE_ENDPOINT.replace(FANTASY_BASE_ENDPOINT, self.base_url)
+        self.record_dir = Path(record_dir) if record_dir else None
+
+    def _get(self, url: str, params: dict = None, headers: dict = None) -> requests.Response:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        r = self.session.get(url, params=params, headers=headers, cookies=self.cookies)
+        if instrument.active():
+            instrument.record_request(endpoint_label(url, params), time.perf_counter() - start, len(r.content), r.status_code)
+        if self.record_dir and r.status_code == 200 and url.startswith(self.base_url):
+            self._record(url, params, headers, r)
+        return r
+
+    def _record(self, url: str, params: dict, headers: dict, r: requests.Response):
+        path, _, query = url[len(self.base_url):].partition("?")
+        fantasy_filter = (headers or {}).get("x-fantasy-filter")
+        key = fixture_key(path, canonical_query(query) + "&" + canonical_query(params), fantasy_filter)
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.record_dir / fixture_name(key), "w") as f:
+            json.dump({"key": key, "body": r.json()}, f)
+
+    def checkRequestStatus(self, status: int, extend: str = "", params: dict = None, headers: dict = None) -> dict:
+        if status == 401:
+            # Same alternate-endpoint retry as espn_api, but through _get()
+            if "/leagueHistory/" in self.LEAGUE_ENDPOINT:
+                base_endpoint = self.LEAGUE_ENDPOINT.split("/leagueHistory/")[0]
+                alternate_endpoint = f"{base_endpoint}/seasons/{self.year}/segments/0/leagues/{self.league_id}"
+            else:
+                base_endpoint = self.LEAGUE_ENDPOINT.split("/seasons/")[0]
+                alternate_endpoint = f"{base_endpoint}/leagueHistory/{self.league_id}?seasonId={self.year}"
+
+            r = self._get(alternate_endpoint + extend, params=params, headers=headers)
+            if r.status_code == 200:
+                self.LEAGUE_ENDPOINT = alternate_endpoint
+                return r.json()
+            if not self.cookies or "espn_s2" not in self.cookies or "SWID" not in self.cookies:
+                raise ESPNAccessDenied("espn_s2 and swid are required")
+            raise ESPNAccessDenied(f"League {self.league_id} cannot be accessed with the provided credentials")
+
+        elif status == 404:
+            if extend and "communication" in extend:
+                return {"topics": []}
+            raise ESPNInvalidLeague(f"League {self.league_id} does not exist")
+
+        elif status != 200:
+            raise ESPNUnknownError(f"ESPN returned an HTTP {status}")
+
+        return None
+
+    def league_get(self, params: dict = None, headers: dict = None, extend: str = ""):
+        endpoint = self.LEAGUE_ENDPOINT + extend
+        r = self._get(endpoint, params=params, headers=headers)
+        alternate_response = self.checkRequestStatus(r.status_code, extend=extend, params=params, headers=headers)
+        response = alternate_response if alternate_response else r.json()
+
+        if self.logger:
+            self.logger.log_request(endpoint=endpoint, params=params, headers=headers, response=response)
+        return response[0] if isinstance(response, list) else response
+
+    def get(self, params: dict = None, headers: dict = None, extend: str = ""):
+        endpoint = self.ENDPOINT + extend
+        r = self._get(endpoint, params=params, headers=headers)
+        if r.status_code == 404:
+            return self.checkRequestStatus(r.status_code, extend=extend)
+        self.checkRequestStatus(r.status_code)
+
+        if self.logger:
+            self.logger.log_request(endpoint=endpoint, params=params, headers=headers, response=r.json())
+        return r.json()
+
+    def news_get(self, params: dict = None, headers: dict = None, extend: str = ""):
+        r = self._get(self.NEWS_ENDPOINT + extend, params=params, headers=headers)
+        return r.json()
+
+
+# --- League Connection ---
+def connect_league(league_id: int, year: int, swid: str = None, espn_s2: str = None, base_url: str = None,
+                   record_dir: Path = None, session: requests.Session = None, rate_limiter: RateLimiter = None) -> League:
+    """Build a League whose requests go through ClientRequests, then fetch it."""
+    league = League(league_id=league_id, year=year, swid=swid, espn_s2=espn_s2, fetch_league=False)
+    old = league.espn_request
+    league.espn_request = ClientRequests(
+        sport="nfl", year=year, league_id=league_id, cookies=old.cookies, logger=old.logger,
+        base_url=base_url, record_dir=record_dir, session=session, rate_limiter=rate_limiter,
+    )
+    league.fetch_league()
+    return league
+
+
+# --- Status Pre-check ---
+# Enough to tell whether anything the standings use has changed, without rosters or players
+STATUS_VIEWS = ["mStatus", "mMatchupScore", "mTeam"]
+
+
+def fetch_status(league_id: int, year: int, swid: str = None, espn_s2: str = None, base_url: str = None,
+                 record_dir: Path = None, session: requests.Session = None, rate_limiter: RateLimiter = None) -> dict:
+    """One small request: scoring period, status, every matchup's score and each team's record."""
+    cookies = {"espn_s2": espn_s2, "SWID": swid} if espn_s2 and swid else None
+    request = ClientRequests(
+        sport="nfl", year=year, league_id=league_id, cookies=cookies,
+        base_url=base_url, record_dir=record_dir, session=session, rate_limiter=rate_limiter,
+    )
+    return request.league_get(params={"view": STATUS_VIEWS})
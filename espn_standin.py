@@ -0,0 +1,199 @@
+"""
+Offline stand-in for ESPN's fantasy API.
+
+Replays recorded responses (see GetLeagueData.py --record) or a synthetic league, with
+optional artificial latency and error injection, so the pipeline can be run and
+benchmarked with no network:
+
+    python espn_standin.py synth fixtures/ --teams 12 --weeks 10
+    python espn_standin.py serve fixtures/ --latency 0.2 --error-rate 0.05
+    ESPN_BASE_URL=http://127.0.0.1:8765 python GetLeagueData.py
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from espn_client import STATUS_VIEWS, fixture_key, fixture_name
+
+
+# --- Server ---
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir: Path, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = None):
+        super().__init__(address, StandInHandler)
+        self.fixtures = {}
+        for path in Path(fixtures_dir).glob("*.json"):
+            with open(path) as f:
+                data = json.load(f)
+            if "key" in data:
+                self.fixtures[data["key"]] = json.dumps(data["body"]).encode()
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "misses": 0}
+
+    def roll(self):
+        """(delay, inject_error) for one request; drawn under a lock so a seed is reproducible."""
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            return delay, self.rng.random() < self.error_rate
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive like ESPN, so pooled sessions reuse their connections
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        key = fixture_key(url.path, url.query, self.headers.get("x-fantasy-filter"))
+        delay, inject_error = self.server.roll()
+        if delay:
+            time.sleep(delay)
+
+        if inject_error:
+            self.server.stats["errors"] += 1
+            return self.reply(503, b'{"message": "injected error"}')
+
+        body = self.server.fixtures.get(key)
+        if body is None:
+            self.server.stats["misses"] += 1
+            print(f"[WARN] No fixture for {key}")
+            return self.reply(404, json.dumps({"message": "no fixture", "key": key}).encode())
+        self.reply(200, body)
+
+    def reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --- Synthetic League ---
+def synthesize(out_dir: Path, league_id: int = 487404, year: int = 2025, teams: int = 12,
+               weeks: int = 10, reg_season: int = 14, seed: int = 0):
+    """Write fixtures for a synthetic league that is `weeks` weeks into its season."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    league_path = f"ffl/seasons/{year}/segments/0/leagues/{league_id}"
+    season_path = f"ffl/seasons/{year}"
+
+    def write(path, params, body, fantasy_filter=None):
+        key = fixture_key(path, params, fantasy_filter)
+        with open(out_dir / fixture_name(key), "w") as f:
+            json.dump({"key": key, "body": body}, f)
+
+    # Round-robin pairings per matchup period, with scores for the weeks played so far
+    ids = list(range(1, teams + 1))
+    schedule, records = [], {i: {"wins": 0, "losses": 0, "ties": 0, "pointsFor": 0.0, "pointsAgainst": 0.0} for i in ids}
+    for period in range(1, reg_season + 1):
+        shift = (period - 1) % (teams - 1)
+        rotated = [ids[0]] + ids[1:][shift:] + ids[1:][:shift]
+        for home, away in zip(rotated[: teams // 2], reversed(rotated[teams // 2:])):
+            played = period < weeks
+            live = period == weeks
+            hs = round(rng.gauss(115, 25), 2) if played or live else 0
+            aws = round(rng.gauss(115, 25), 2) if played or live else 0
+            winner = ("HOME" if hs > aws else "AWAY" if aws > hs else "TIE") if played else "UNDECIDED"
+            if played:
+                for team, pf, pa, won in ((home, hs, aws, winner == "HOME"), (away, aws, hs, winner == "AWAY")):
+                    records[team]["wins" if won else "losses"] += 1
+                    records[team]["pointsFor"] += pf
+                    records[team]["pointsAgainst"] += pa
+            schedule.append({
+                "id": len(schedule) + 1, "matchupPeriodId": period, "winner": winner,
+                "home": {"teamId": home, "totalPoints": hs, "rosterForCurrentScoringPeriod": {"entries": []}},
+                "away": {"teamId": away, "totalPoints": aws, "rosterForCurrentScoringPeriod": {"entries": []}},
+            })
+
+    team_data = [
+        {
+            "id": i, "abbrev": f"T{i}", "name": f"Team {i}", "divisionId": 0, "playoffSeed": i,
+            "logo": "", "owners": [f"{{OWNER-{i}}}"],
+            "transactionCounter": {"acquisitionBudgetSpent": rng.randint(0, 100)},
+            "record": {"overall": {**records[i], "streakLength": 1, "streakType": "WIN"}},
+        }
+        for i in ids
+    ]
+    settings = {
+        "name": "Synthetic League", "size": teams,
+        "scheduleSettings": {
+            "matchupPeriodCount": reg_season, "playoffTeamCount": 6, "playoffSeedingRule": "TOTAL_POINTS_SCORED",
+            "matchupPeriods": {str(p): [p] for p in range(1, 18)},
+        },
+        "tradeSettings": {"vetoVotesRequired": 4}, "draftSettings": {"keeperCount": 0},
+        "scoringSettings": {"matchupTieRule": "NONE", "playoffMatchupTieRule": "NONE", "scoringItems": []},
+        "acquisitionSettings": {"isUsingAcquisitionBudget": True, "acquisitionBudget": 100},
+        "rosterSettings": {"lineupSlotCounts": {}},
+    }
+    status = {
+        "currentMatchupPeriod": weeks, "firstScoringPeriod": 1, "finalScoringPeriod": 17,
+        "latestScoringPeriod": weeks, "previousSeasons": [],
+    }
+
+    write(league_path, {"view": ["mTeam", "mRoster", "mMatchup", "mSettings", "mStandings"]}, {
+        "seasonId": year, "scoringPeriodId": weeks, "status": status, "settings": settings,
+        "teams": team_data, "members": [{"id": f"{{OWNER-{i}}}"} for i in ids], "schedule": schedule,
+    })
+    write(league_path, {"view": STATUS_VIEWS}, {
+        "seasonId": year, "scoringPeriodId": weeks, "status": status, "teams": team_data, "schedule": schedule,
+    })
+    write(season_path + "/players", {"view": "players_wl"}, [], json.dumps({"filterActive": {"value": True}}))
+    write(season_path, {"view": "proTeamSchedules_wl"}, {"settings": {"proTeams": []}})
+    write(league_path, {"view": "mDraftDetail"}, {"draftDetail": {"drafted": False}})
+    for week in range(1, weeks + 1):
+        fantasy_filter = json.dumps({"schedule": {"filterMatchupPeriodIds": {"value": [str(week)]}}})
+        write(league_path, {"view": ["mMatchupScore", "mScoreboard"], "scoringPeriodId": week},
+              {"schedule": [m for m in schedule if m["matchupPeriodId"] == week]}, fantasy_filter)
+        write(league_path, {"view": "mPositionalRatings", "scoringPeriodId": week}, {})
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Offline ESPN fantasy API stand-in.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="replay fixtures over HTTP")
+    serve.add_argument("fixtures", type=Path)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    serve.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 503")
+    serve.add_argument("--seed", type=int, default=None)
+
+    synth = sub.add_parser("synth", help="write fixtures for a synthetic league")
+    synth.add_argument("out", type=Path)
+    synth.add_argument("--league-id", type=int, default=487404)
+    synth.add_argument("--year", type=int, default=2025)
+    synth.add_argument("--teams", type=int, default=12)
+    synth.add_argument("--weeks", type=int, default=10, help="current week of the synthetic season")
+    synth.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "synth":
+        synthesize(args.out, args.league_id, args.year, args.teams, args.weeks, seed=args.seed)
+        print(f"Fixtures written to {args.out}")
+        return
+
+    server = StandInServer((args.host, args.port), args.fixtures, args.latency, args.jitter, args.error_rate, args.seed)
+    print(f"Serving {len(server.fixtures)} fixtures on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
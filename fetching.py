@@ -0,0 +1,242 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import requests
+import instrument
+from espn_api.football import League
+from espn_api.requests.espn_requests import ESPNUnknownError
+
+# Errors worth retrying: dropped connections, timeouts and ESPN 5xx responses.
+RETRYABLE_ERRORS = (requests.RequestException, ESPNUnknownError)
+
+
+# --- Box Score Fetching ---
+def retry_call(fn, *args, retries: int = 3, backoff: float = 1.0, **kwargs):
+    """Call fn, retrying transient failures with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except RETRYABLE_ERRORS:
+            if attempt == retries:
+                raise
+            instrument.count("fetch.retry")
+            time.sleep(backoff * 2 ** attempt)
+
+
+def fetch_week(l: League, week: int, retries: int = 3, backoff: float = 1.0):
+    """Fetch one week's box scores, retrying transient failures with exponential backoff."""
+    with instrument.timed("box_scores", week=week):
+        return retry_call(l.box_scores, week, retries=retries, backoff=backoff)
+
+
+def fetch_box_scores(l: League, weeks, max_workers: int = 1, retries: int = 3, backoff: float = 1.0) -> dict:
+    """
+    Fetch box scores for several weeks, returning {week: box_scores} in week order.
+
+    Weeks that raise KeyError (no data on ESPN's side) are left out, same as the
+    serial loop. With max_workers > 1 the weeks are fetched on a bounded thread pool.
+    """
+    weeks = list(weeks)
+
+    def fetch(week):
+        try:
+            return fetch_week(l, week, retries, backoff)
+        except KeyError:
+            return None
+
+    if max_workers <= 1 or len(weeks) <= 1:
+        results = [fetch(week) for week in weeks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(weeks))) as pool:
+            results = list(pool.map(fetch, weeks))
+
+    return {week: box for week, box in zip(weeks, results) if box is not None}
+
+
+# --- Normalized Week Scores ---
+def normalize_week(box_scores) -> list:
+    """Reduce a week's box scores to [team_id, score] pairs (team_id is None for a bye slot)."""
+    return [
+        [team.team_id if team is not None else None, score]
+        for b in box_scores
+        for team, score in ((b.home_team, b.home_score), (b.away_team, b.away_score))
+        if score is not None
+    ]
+
+
+def matchup_period(l: League, week: int) -> int:
+    """Matchup period a scoring week belongs to (same lookup box_scores uses)."""
+    for period, weeks in l.settings.matchup_periods.items():
+        if week in weeks:
+            return int(period)
+    return week
+
+
+def is_week_final(l: League, week: int) -> bool:
+    """A week is final once ESPN has moved past it and decided every team's matchup."""
+    if week >= l.current_week:
+        return False
+    idx = matchup_period(l, week) - 1
+    return all(idx < len(t.outcomes) and t.outcomes[idx] != "U" for t in l.teams)
+
+
+def has_stat_correction(l: League, week: int, entries: list) -> bool:
+    """True when the league's current matchup scores no longer agree with a cached week."""
+    idx = matchup_period(l, week) - 1
+    teams = {t.team_id: t for t in l.teams}
+    for team_id, score in entries:
+        team = teams.get(team_id)
+        if team is None:
+            continue
+        if idx >= len(team.scores) or team.scores[idx] is None:
+            return True
+        if abs(round(team.scores[idx], 2) - score) > 0.005:
+            return True
+    return False
+
+
+# --- Finalized Week Score Store ---
+# Store dimensions: NFL regular season + playoffs, and ESPN's largest league size
+MAX_WEEKS = 18
+MAX_TEAMS = 20
+
+
+class ScoreStore:
+    """
+    Per-league, per-season float32 score matrix for finalized weeks, memory-mapped.
+
+    scores_<league_id>_<year>.npy holds a MAX_WEEKS x (MAX_TEAMS + 1) matrix (row =
+    week - 1, NaN = no score). Columns follow team_ids in the small JSON index next to
+    it; the last column counts bye slots (no team, score 0) and is NaN for weeks not
+    stored. Writing a week only touches that week's row.
+    """
+
+    def __init__(self, cache_dir: Path, league_id: int, year: int):
+        self.league_id, self.year = league_id, year
+        self.path = Path(cache_dir) / f"scores_{league_id}_{year}.npy"
+        self.index_path = self.path.with_suffix(".json")
+        self.team_ids = []
+        # Non-final weeks fetched during this run; reused within the run but never saved
+        self.live = {}
+        if self.path.exists() and self.index_path.exists():
+            with open(self.index_path) as f:
+                self.team_ids = json.load(f)["team_ids"]
+            self.matrix = np.lib.format.open_memmap(self.path, mode="r+")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.matrix = np.lib.format.open_memmap(self.path, mode="w+", dtype=np.float32, shape=(MAX_WEEKS, MAX_TEAMS + 1))
+            self.matrix[:] = np.nan
+        self.columns = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        self.dirty = False
+
+    def weeks(self) -> list:
+        return [int(w) + 1 for w in np.flatnonzero(~np.isnan(self.matrix[:, -1]))]
+
+    def has(self, week: int) -> bool:
+        """Whether a finalized week is stored (live weeks are not)."""
+        return 1 <= week <= MAX_WEEKS and not np.isnan(self.matrix[week - 1, -1])
+
+    def span(self, first: int, last: int) -> np.ndarray:
+        """
+        Weeks first..last as a view of the memmap, no copy: row i is week first + i and
+        columns follow team_ids (the bye count column is left out).
+        """
+        return self.matrix[first - 1:last, :len(self.team_ids)]
+
+    def copy_into(self, out: np.ndarray, out_rows: list, weeks: list, team_ids: list):
+        """
+        Write the stored weeks into out[out_rows], columns reordered to team_ids, in one
+        gather from span() (teams with no column are left untouched). Values stay as
+        stored (float32 precision); callers that need get()'s rounding round them.
+        """
+        cols = [self.columns.get(team_id) for team_id in team_ids]
+        known = [i for i, col in enumerate(cols) if col is not None]
+        first = min(weeks)
+        span = self.span(first, max(weeks))
+        out[np.ix_(out_rows, known)] = span[np.ix_([w - first for w in weeks], [cols[i] for i in known])]
+
+    def get(self, week: int):
+        if not self.has(week):
+            return None
+        row = self.matrix[week - 1]
+        entries = [[team_id, round(float(row[i]), 2)] for team_id, i in self.columns.items() if not np.isnan(row[i])]
+        return entries + [[None, 0.0]] * int(row[-1])
+
+    def put(self, week: int, scores: list):
+        if not 1 <= week <= MAX_WEEKS:
+            return
+        new_ids = list(dict.fromkeys(t for t, _ in scores if t is not None and t not in self.columns))
+        if len(self.team_ids) + len(new_ids) > MAX_TEAMS:
+            raise ValueError(f"{self.path.name} holds at most {MAX_TEAMS} teams, week {week} would need "
+                             f"{len(self.team_ids) + len(new_ids)}")
+        for team_id in new_ids:
+            self.columns[team_id] = len(self.team_ids)
+            self.team_ids.append(team_id)
+        row = np.full(MAX_TEAMS + 1, np.nan, dtype=np.float32)
+        row[-1] = 0
+        for team_id, score in scores:
+            if team_id is None:
+                row[-1] += 1
+            else:
+                row[self.columns[team_id]] = score
+        self.matrix[week - 1] = row
+        self.dirty = True
+
+    def invalidate(self, week: int):
+        if self.has(week):
+            self.matrix[week - 1] = np.nan
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.matrix.flush()
+        with open(self.index_path, "w") as f:
+            json.dump({"league_id": self.league_id, "year": self.year, "team_ids": self.team_ids}, f)
+        self.dirty = False
+
+
+def load_weekly_scores(l: League, weeks, cache: ScoreStore = None, **fetch_kwargs) -> dict:
+    """
+    Return {week: [[team_id, score], ...]} for the requested weeks.
+
+    Finalized weeks come from the store unless the league's matchup scores show a
+    stat correction; everything else is fetched and final weeks are written back.
+    """
+    weeks = list(weeks)
+    weekly = {}
+
+    if cache is not None:
+        for week in weeks:
+            if week in cache.live:
+                weekly[week] = cache.live[week]
+                instrument.count("score_store.hit")
+                continue
+            cached = cache.get(week)
+            if cached is None:
+                instrument.count("score_store.miss")
+                continue
+            if has_stat_correction(l, week, cached):
+                print(f"[INFO] Stat correction detected for week {week}, refetching")
+                instrument.count("score_store.stat_correction")
+                instrument.count("score_store.miss")
+                cache.invalidate(week)
+                continue
+            weekly[week] = cached
+            instrument.count("score_store.hit")
+
+    missing = [week for week in weeks if week not in weekly]
+    for week, box_scores in fetch_box_scores(l, missing, **fetch_kwargs).items():
+        weekly[week] = normalize_week(box_scores)
+        if cache is not None and is_week_final(l, week):
+            cache.put(week, weekly[week])
+        elif cache is not None:
+            cache.live[week] = weekly[week]
+
+    if cache is not None:
+        cache.save()
+
+    return {week: weekly[week] for week in weeks if week in weekly}
@@ -0,0 +1,287 @@
+"""
+All-time standings across every season the league has existed.
+
+    python history.py                      # every season ESPN lists for the league
+    python history.py --start 2019 --workers 4
+
+Each completed season is fetched once and stored column-wise in
+.cache/history/season_<league_id>_<year>.npz; later runs read it from there and only
+the unfinished current season and the configured season (built with its adjustments,
+like LeagueData.json) are fetched again. Writes LeagueData_history.json with
+per-season rows and all-time totals per team.
+"""
+import os
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from espn_api.football import League
+from espn_client import connect_league, make_session
+from fetching import retry_call, matchup_period
+from standings import (
+    LAST_MEDIAN_WEEK, TeamRecord, TeamIndex, owner_ids, median_weeks, get_median_records, collect_team_data,
+    load_overlays, apply_adjustments, encode_json
+)
+from publish import columnar, write_views
+from GetLeagueData import LEAGUE_ID, YEAR, ADJUSTMENTS, CACHE_DIR, FETCH_RETRIES, FETCH_BACKOFF, HTTP2
+
+HISTORY_FILE = Path("LeagueData_history.json")
+HISTORY_WORKERS = 4
+
+
+# --- Season Columns ---
+def schedule_scores(l: League, weeks) -> dict:
+    """
+    {week: [[team_id, score], ...]} from the matchup scores loaded with the league.
+
+    Only decided matchups are used. Seasons before 2019 have no box scores, and for
+    decided weeks the schedule totals are the same numbers, so no extra requests.
+    """
+    weekly_scores = {}
+    for week in weeks:
+        idx = matchup_period(l, week) - 1
+        weekly_scores[week] = [
+            [t.team_id, round(t.scores[idx], 2)]
+            for t in l.teams
+            if idx < len(t.outcomes) and t.outcomes[idx] != "U" and t.scores[idx] is not None
+        ]
+    return weekly_scores
+
+
+def season_complete(l: League) -> bool:
+    """True once every matchup of the season, playoffs included, is decided."""
+    return bool(l.teams) and all(o != "U" for t in l.teams for o in t.outcomes)
+
+
+def season_columns(l: League, overlays: list = None, weekly_scores: dict = None) -> dict:
+    """
+    One season's standings as equal-length column arrays, one entry per team.
+
+    Past seasons count median games from week 1, from the schedule scores. The
+    configured season is given its overlays and built like the published standings:
+    median from week 2 over its weekly scores (box scores, fetched unless given),
+    then the overlays applied to the rows.
+    """
+    if overlays is None:
+        median_records = get_median_records(l, weekly_scores=schedule_scores(l, median_weeks(l, 1)))
+    else:
+        median_records = get_median_records(l, weekly_scores=weekly_scores)
+    rows = collect_team_data(l, median_records)
+    if overlays is not None:
+        apply_adjustments(rows, TeamIndex.from_league(l), overlays)
+    return {
+        "year": np.array(l.year, dtype=np.int16),
+        "last_median_week": np.array(LAST_MEDIAN_WEEK, dtype=np.int16),
+        "complete": np.array(season_complete(l)),
+        "previous_seasons": np.array(l.previousSeasons, dtype=np.int16),
+        "team_id": np.array([t.team_id for t in l.teams], dtype=np.int32),
+        "team_name": np.array([t.team_name for t in l.teams], dtype=str),
+        "owner": np.array([(owner_ids(t) or [""])[0] for t in l.teams], dtype=str),
+        "wins": np.array([row["Matchup Record"].wins for row in rows], dtype=np.int16),
+        "losses": np.array([row["Matchup Record"].losses for row in rows], dtype=np.int16),
+        "ties": np.array([row["Matchup Record"].ties for row in rows], dtype=np.int16),
+        "median_wins": np.array([row["Median Score Record"].wins for row in rows], dtype=np.int16),
+        "median_losses": np.array([row["Median Score Record"].losses for row in rows], dtype=np.int16),
+        "pf": np.array([row["PF"] for row in rows], dtype=np.float64),
+        "pa": np.array([row["PA"] for row in rows], dtype=np.float64),
+        "seed": np.array([t.standing or 0 for t in l.teams], dtype=np.int16),
+        "final_standing": np.array([t.final_standing or 0 for t in l.teams], dtype=np.int16),
+    }
+
+
+# --- Season Store ---
+class SeasonStore:
+    """Completed seasons' columns, one compressed .npz file per season."""
+
+    def __init__(self, store_dir: Path, league_id: int):
+        self.dir = Path(store_dir)
+        self.league_id = league_id
+
+    def path(self, year: int) -> Path:
+        return self.dir / f"season_{self.league_id}_{year}.npz"
+
+    def get(self, year: int):
+        """A stored season, or None."""
+        path = self.path(year)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            # Seasons stored with another median range are rebuilt
+            if "last_median_week" not in data.files or int(data["last_median_week"]) != LAST_MEDIAN_WEEK:
+                return None
+            return {name: data[name] for name in data.files}
+
+    def put(self, columns: dict):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(self.path(int(columns["year"])), **columns)
+
+
+def load_season(store: SeasonStore, year: int, league: League = None, overlays: list = None, weekly_scores: dict = None,
+                **connect_kwargs) -> dict:
+    """
+    A season's columns from the store, fetching (and storing, once complete) when missing.
+
+    A season given overlays is always rebuilt and never stored, as its overlays can change.
+    """
+    columns = store.get(year) if overlays is None else None
+    if columns is not None:
+        return columns
+    if league is None:
+        league = retry_call(connect_league, store.league_id, year, **connect_kwargs)
+    columns = season_columns(league, overlays, weekly_scores)
+    if columns["complete"] and overlays is None:
+        store.put(columns)
+    return columns
+
+
+def backfill(league_id: int, years, store: SeasonStore, workers: int = HISTORY_WORKERS,
+             current: League = None, overlays: dict = None, weekly_scores: dict = None, **connect_kwargs) -> dict:
+    """
+    {year: columns} for every year, fetching missing seasons in parallel.
+
+    current is an already-connected League for its own year, reused rather than
+    fetched again. overlays maps the configured season's year to its adjustment
+    overlays (see season_columns), and weekly_scores any of its weekly scores already
+    loaded. A season that cannot be loaded is reported and left out.
+    """
+    overlays, weekly_scores = overlays or {}, weekly_scores or {}
+
+    def load(year):
+        try:
+            league = current if current is not None and current.year == year else None
+            return year, load_season(store, year, league, overlays.get(year), weekly_scores.get(year), **connect_kwargs)
+        except Exception as e:
+            print(f"[WARN] Season {year} skipped: {e}")
+            return year, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        seasons = dict(pool.map(load, sorted(years)))
+    return {year: columns for year, columns in seasons.items() if columns is not None}
+
+
+# --- All-Time Standings ---
+def season_rows(columns: dict) -> list:
+    rows = []
+    for i in np.argsort(columns["seed"], kind="stable"):
+        matchup = TeamRecord(int(columns["wins"][i]), int(columns["losses"][i]), int(columns["ties"][i]))
+        median = TeamRecord(int(columns["median_wins"][i]), int(columns["median_losses"][i]))
+        rows.append({
+            "Rank": int(columns["seed"][i]),
+            "Team": str(columns["team_name"][i]),
+            "Overall Record": matchup + median,
+            "Matchup Record": matchup,
+            "Median Score Record": median,
+            "PF": float(columns["pf"][i]),
+            "PA": float(columns["pa"][i]),
+            "Final Standing": int(columns["final_standing"][i]) or None,
+        })
+    return rows
+
+
+def all_time_rows(seasons: dict) -> list:
+    """
+    Totals per team over every season, with the team's most recent name.
+
+    Seasons are joined newest first through a TeamIndex, so an older season's team is
+    matched by team_id, then owner, then exact name; a team matching none of them
+    starts its own row instead of being dropped.
+    """
+    index, totals = TeamIndex(), {}
+    for year in sorted(seasons, reverse=True):
+        columns = seasons[year]
+        owners = columns["owner"].tolist() if "owner" in columns else [""] * len(columns["team_id"])
+        for i, team_id in enumerate(columns["team_id"].tolist()):
+            name, owner = str(columns["team_name"][i]), owners[i] or None
+            key, _ = index.resolve(team_id, name, owner, fuzzy=False)
+            key = team_id if key is None else key
+            index.add(key, name, [owner] if owner else ())
+            t = totals.setdefault(key, {
+                "name": name, "names": [], "matchup": TeamRecord(), "median": TeamRecord(), "pf": 0.0, "pa": 0.0,
+                "seasons": 0, "titles": 0, "best": None,
+            })
+            if name != t["name"] and name not in t["names"]:
+                t["names"].append(name)
+            t["matchup"] += TeamRecord(int(columns["wins"][i]), int(columns["losses"][i]), int(columns["ties"][i]))
+            t["median"] += TeamRecord(int(columns["median_wins"][i]), int(columns["median_losses"][i]))
+            t["pf"] += float(columns["pf"][i])
+            t["pa"] += float(columns["pa"][i])
+            t["seasons"] += 1
+            finish = int(columns["final_standing"][i])
+            if finish:
+                t["titles"] += finish == 1
+                t["best"] = finish if t["best"] is None else min(t["best"], finish)
+
+    rows = []
+    for t in totals.values():
+        overall = t["matchup"] + t["median"]
+        rows.append({
+            "Team": t["name"],
+            "Seasons": t["seasons"],
+            "Overall Record": overall,
+            "Matchup Record": t["matchup"],
+            "Median Score Record": t["median"],
+            "Win %": round(overall.win_pct, 3),
+            "PF": round(t["pf"], 2),
+            "PA": round(t["pa"], 2),
+            "Championships": t["titles"],
+            "Best Finish": t["best"],
+            "Past Names": t["names"],
+        })
+    rows.sort(key=lambda r: (-r["Win %"], -r["PF"]))
+    return [{"Rank": rank, **row} for rank, row in enumerate(rows, 1)]
+
+
+def history_data(league_id: int, seasons: dict) -> dict:
+    return {
+        "League ID": league_id,
+        "Seasons": {str(year): season_rows(seasons[year]) for year in sorted(seasons)},
+        "All-Time": all_time_rows(seasons),
+    }
+
+
+def history_view(history: dict) -> dict:
+    """The history in the page's compact columnar form."""
+    return {
+        "league_id": history["League ID"],
+        "seasons": {year: columnar(rows) for year, rows in history["Seasons"].items()},
+        "all_time": columnar(history["All-Time"]),
+    }
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Build all-time standings from every season of the league.")
+    parser.add_argument("--start", type=int, help="first season (default: the league's first season on ESPN)")
+    parser.add_argument("--end", type=int, default=YEAR, help="last season")
+    parser.add_argument("--workers", type=int, default=HISTORY_WORKERS, help="seasons fetched in parallel")
+    parser.add_argument("--output", type=Path, default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    connect_kwargs = {
+        "swid": os.getenv("SWID"), "espn_s2": os.getenv("ESPN_S2"), "base_url": os.getenv("ESPN_BASE_URL"),
+        "retries": FETCH_RETRIES, "backoff": FETCH_BACKOFF, "session": make_session(args.workers, HTTP2),
+    }
+    store = SeasonStore(CACHE_DIR / "history", LEAGUE_ID)
+    overlays = {YEAR: load_overlays([p for p in ADJUSTMENTS if p.exists()])}
+
+    # The last season is only fetched when it is not stored yet (i.e. still in progress,
+    # or the configured season); either way it lists the league's earlier seasons
+    current, latest = None, store.get(args.end) if args.end not in overlays else None
+    if latest is None:
+        current = retry_call(connect_league, LEAGUE_ID, args.end, **connect_kwargs)
+        previous = current.previousSeasons
+    else:
+        previous = latest["previous_seasons"].tolist()
+    start = args.start if args.start is not None else min(previous + [args.end])
+
+    seasons = backfill(LEAGUE_ID, range(start, args.end + 1), store, args.workers, current, overlays, **connect_kwargs)
+    history = history_data(LEAGUE_ID, seasons)
+    with open(args.output, "w") as f:
+        json.dump(history, f, indent=2, default=encode_json)
+    write_views({"history": history_view(history)})
+    print(f"{len(seasons)} season(s) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import sys
+import json
+import time
+import cProfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager, ExitStack
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then left out
+    resource = None
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional: --profile pyinstrument needs it
+    Profiler = None
+
+# Recorders receiving the hooks below: a RunReport and/or a metrics exporter (see metrics.py).
+# Every hook is a no-op while this is empty.
+_recorders = ()
+
+
+class RunReport:
+    """
+    Timings and counters for one pipeline run, safe to record into from worker threads.
+
+    Stages nest ("build/median"); requests are grouped by endpoint with their count,
+    total latency and bytes; counters hold things like cache hits and misses; timings
+    are named operations such as one week's box score fetch.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.requests = {}
+        self.timings = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str):
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        key = "/".join(stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                entry = self.stages.setdefault(key, {"seconds": 0.0, "calls": 0})
+                entry["seconds"] += elapsed
+                entry["calls"] += 1
+
+    def record_request(self, endpoint: str, seconds: float, size: int, status: int):
+        with self.lock:
+            entry = self.requests.setdefault(endpoint, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "bytes": 0, "errors": 0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["bytes"] += size
+            entry["errors"] += status != 200
+
+    def observe(self, name: str, seconds: float, **labels):
+        # Labels (e.g. the week) are only kept by metrics exporters; the report aggregates per name
+        with self.lock:
+            entry = self.timings.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            requests = {
+                endpoint: {**r, "seconds": round(r["seconds"], 4), "max_seconds": round(r["max_seconds"], 4),
+                           "mean_seconds": round(r["seconds"] / r["calls"], 4)}
+                for endpoint, r in sorted(self.requests.items())
+            }
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+                "seconds": round(time.time() - self.started, 4),
+                "stages": {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in self.stages.items()},
+                "requests": requests,
+                "timings": {k: {**v, "seconds": round(v["seconds"], 4), "max_seconds": round(v["max_seconds"], 4)}
+                            for k, v in sorted(self.timings.items())},
+                "totals": {
+                    "requests": sum(r["calls"] for r in requests.values()),
+                    "request_seconds": round(sum(r["seconds"] for r in requests.values()), 4),
+                    "bytes": sum(r["bytes"] for r in requests.values()),
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "cache_hit_rates": hit_rates(self.counters),
+                "gauges": dict(sorted(self.gauges.items())),
+                "peak_rss_bytes": peak_rss(),
+            }
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def hit_rates(counters: dict) -> dict:
+    """hit / (hit + miss) for every "<name>.hit" / "<name>.miss" counter pair."""
+    rates = {}
+    for name in {k.rsplit(".", 1)[0] for k in counters if k.endswith((".hit", ".miss"))}:
+        hits, misses = counters.get(f"{name}.hit", 0), counters.get(f"{name}.miss", 0)
+        rates[name] = round(hits / (hits + misses), 4) if hits + misses else None
+    return dict(sorted(rates.items()))
+
+
+def peak_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+# --- Hooks ---
+def attach(recorder):
+    global _recorders
+    _recorders = (*_recorders, recorder)
+
+
+def detach(recorder):
+    global _recorders
+    _recorders = tuple(r for r in _recorders if r is not recorder)
+
+
+def start() -> RunReport:
+    report = RunReport()
+    attach(report)
+    return report
+
+
+def stop():
+    """Detach every RunReport; exporters stay attached."""
+    global _recorders
+    _recorders = tuple(r for r in _recorders if not isinstance(r, RunReport))
+
+
+def active() -> bool:
+    """True when something is recording, for callers with work to skip otherwise."""
+    return bool(_recorders)
+
+
+@contextmanager
+def stage(name: str):
+    if not _recorders:
+        yield
+        return
+    with ExitStack() as stack:
+        for r in _recorders:
+            stack.enter_context(r.stage(name))
+        yield
+
+
+@contextmanager
+def timed(name: str, **labels):
+    """Time the block and record it as observe(name, seconds, **labels), failures included."""
+    if not _recorders:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def record_request(endpoint: str, seconds: float, size: int, status: int):
+    for r in _recorders:
+        r.record_request(endpoint, seconds, size, status)
+
+
+def observe(name: str, seconds: float, **labels):
+    for r in _recorders:
+        r.observe(name, seconds, **labels)
+
+
+def count(name: str, n: int = 1):
+    for r in _recorders:
+        r.count(name, n)
+
+
+def gauge(name: str, value: float):
+    for r in _recorders:
+        r.gauge(name, value)
+
+
+# --- Profiling ---
+@contextmanager
+def profiled(kind: str = None, stem: Path = Path("run_profile")):
+    """Profile the block with cProfile (<stem>.prof) or pyinstrument (<stem>.html); kind=None does nothing."""
+    if kind is None:
+        yield
+        return
+    if kind == "pyinstrument" and Profiler is None:
+        print("[WARN] pyinstrument is not installed, profiling with cProfile instead")
+        kind = "cprofile"
+
+    profiler = Profiler() if kind == "pyinstrument" else cProfile.Profile()
+    profiler.start() if kind == "pyinstrument" else profiler.enable()
+    try:
+        yield
+    finally:
+        if kind == "pyinstrument":
+            profiler.stop()
+            path = stem.with_suffix(".html")
+            path.write_text(profiler.output_html())
+        else:
+            profiler.disable()
+            path = stem.with_suffix(".prof")
+            profiler.dump_stats(path)
+        print(f"Profile written to {path}")
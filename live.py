@@ -0,0 +1,299 @@
+"""
+Live game-day standings: poll the current week's scores and project the week's outcome.
+
+    python live.py                                     # the league configured in GetLeagueData.py
+    python live.py --leagues leagues.json --interval 60 --concurrency 8 --rate 10
+
+Each poll fetches only the current week's box scores. Every team's projected score
+(ESPN's live projection: points so far plus the rest of the lineup's projections)
+decides its matchup and its result against the projected median, and these are
+added to the records of the weeks already final (with the league's adjustment
+overlays applied, as in the published standings) to give projected standings.
+"PF" is the points actually scored so far; "Projected PF" adds the projected rest of
+the week and is what the projected ranking uses.
+
+Output per league, in <out-dir>/<league_id>_<year>/:
+
+    live.json      full snapshot: {"seq", "week", "updated", "median", "projected_median",
+                   "teams": {"columns": [...], "data": [...]}}
+    deltas.jsonl   one compact line per poll that changed anything after the snapshot:
+                   {"seq", "updated", [median, projected_median,] "teams": {team_id: {column: value}}}
+
+A client loads live.json and applies the deltas with a higher seq in order. The
+snapshot is rewritten (and deltas.jsonl emptied) every --compact deltas and when the
+week changes. leagues.json uses batch.py's format; all leagues share one HTTP session
+and rate limiter.
+"""
+import json
+import time
+import argparse
+import instrument
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from espn_api.football import League
+from espn_client import RateLimiter, make_session
+from fetching import ScoreStore, fetch_week, load_weekly_scores, is_week_final, matchup_period
+from standings import (
+    TeamRecord, TeamIndex, DEFAULT_TIEBREAKS, median_weeks, median_score, week_median_results, fold_median_results,
+    apply_adjustments, head_to_head_wins, rank_teams
+)
+from pipeline import LeagueStandings
+from publish import columnar, dumps_compact, row_changes
+from metrics import start_metrics
+from batch import load_leagues
+from GetLeagueData import FETCH_WORKERS, HTTP2, RATE_LIMIT, RATE_BURST, configured_league, make_standings
+
+LIVE_DIR = Path("live")
+# Seconds between polls; leagues are reconnected (picking up a new week and final records) every LIVE_RECONNECT
+LIVE_INTERVAL = 60
+LIVE_RECONNECT = 1800
+# Deltas written before the snapshot is rewritten
+LIVE_COMPACT = 100
+
+LIVE_COLUMNS = (
+    "Team ID", "Team", "Score", "Projected", "Matchup", "Median", "Overall Record", "Median Score Record",
+    "PF", "Projected PF", "Rank",
+)
+
+
+# --- Projection ---
+def base_records(l: League, overlays: list = (), cache: ScoreStore = None, **fetch_kwargs) -> dict:
+    """
+    {team_id: {"overall", "matchup", "median", "pf"}} over the weeks before the current one.
+
+    Only decided regular-season matchups and final weeks count, so nothing from the
+    week being polled (or the playoffs) is included even once ESPN has scored it.
+    Outcomes are indexed by matchup period, which can span several scoring weeks.
+    The overlays are applied the same way the published standings apply them
+    (see standings.apply_adjustments).
+    """
+    current = matchup_period(l, l.current_week) - 1
+    periods = [i for i in range(l.settings.reg_season_count) if i != current]
+    final = [w for w in median_weeks(l) if is_week_final(l, w)]
+    weekly_scores = load_weekly_scores(l, final, cache, **fetch_kwargs)
+    median = fold_median_results(l, (week_median_results(entries) for entries in weekly_scores.values()))
+
+    rows = []
+    for t in l.teams:
+        decided = [(t.outcomes[i], t.scores[i]) for i in periods if i < len(t.outcomes) and t.outcomes[i] != "U"]
+        outcomes = [o for o, _ in decided]
+        matchup = TeamRecord(outcomes.count("W"), outcomes.count("L"), outcomes.count("T"))
+        median_record = TeamRecord(median[t.team_id]["wins"], median[t.team_id]["losses"])
+        rows.append({
+            "Team": t.team_name,
+            "Overall Record": matchup + median_record,
+            "Matchup Record": matchup,
+            "Median Score Record": median_record,
+            "PF": round(sum(s or 0 for _, s in decided), 2),
+        })
+    apply_adjustments(rows, TeamIndex.from_league(l), overlays)
+
+    return {
+        t.team_id: {
+            "overall": row["Overall Record"], "matchup": row["Matchup Record"],
+            "median": row["Median Score Record"], "pf": row["PF"],
+        }
+        for t, row in zip(l.teams, rows)
+    }
+
+
+def live_scores(box_scores) -> dict:
+    """{team_id: (score, projected, opponent_id)} from one week's box scores; bye slots are left out."""
+    def projected(score, projection):
+        # ESPN reports 0 (or nothing) when it has no projection, e.g. for a week already played
+        return round(projection if projection else score, 2)
+
+    scores = {}
+    for b in box_scores:
+        home = b.home_team.team_id if b.home_team else None
+        away = b.away_team.team_id if b.away_team else None
+        if home is not None:
+            scores[home] = (round(b.home_score or 0, 2), projected(b.home_score or 0, b.home_projected), away)
+        if away is not None:
+            scores[away] = (round(b.away_score or 0, 2), projected(b.away_score or 0, b.away_projected), home)
+    return scores
+
+
+def _result(mine: float, theirs: float) -> str:
+    return "W" if mine > theirs else "L" if mine < theirs else "T"
+
+
+def project_week(l: League, base: dict, scores: dict, counts_median: bool, tiebreaks=DEFAULT_TIEBREAKS) -> dict:
+    """The live snapshot fields: current and projected medians plus the projected standings rows."""
+    actual = [s for s, _, _ in scores.values()]
+    projections = [p for _, p, _ in scores.values()]
+    projected_median = median_score(projections) if scores and any(projections) else None
+
+    rows = []
+    for t in l.teams:
+        score, proj, opponent = scores.get(t.team_id, (None, None, None))
+        matchup = _result(proj, scores[opponent][1]) if proj is not None and opponent in scores else None
+        median = None
+        if counts_median and proj is not None and projected_median is not None:
+            median = "W" if proj >= projected_median else "L"
+        week_matchup = TeamRecord(int(matchup == "W"), int(matchup == "L"), int(matchup == "T"))
+        week_median = TeamRecord(int(median == "W"), int(median == "L"))
+        b = base[t.team_id]
+        rows.append({
+            "Team ID": t.team_id,
+            "Team": t.team_name,
+            "Score": score,
+            "Projected": proj,
+            "Matchup": matchup,
+            "Median": median,
+            "Overall Record": b["overall"] + week_matchup + week_median,
+            "Median Score Record": b["median"] + week_median,
+            "PF": round(b["pf"] + (score or 0), 2),
+            "Projected PF": round(b["pf"] + (proj or 0), 2),
+        })
+
+    # Ranked on projected points: the tiebreakers read "PF", so rank stand-in rows carrying the projection
+    ranking = [{**row, "PF": row["Projected PF"]} for row in rows]
+    context = None
+    if "h2h" in tiebreaks:
+        context = {"team_ids": {id(row): row["Team ID"] for row in ranking}, "h2h": head_to_head_wins(l)}
+    rank_teams(ranking, tiebreaks, context)
+    for row, ranked in zip(rows, ranking):
+        row["Rank"] = ranked["Rank"]
+    rows.sort(key=lambda row: row["Rank"])
+    return {
+        "median": round(median_score(actual), 2) if scores and any(actual) else None,
+        "projected_median": round(projected_median, 2) if projected_median is not None else None,
+        "teams": rows,
+    }
+
+
+# --- Live League ---
+class LiveLeague:
+    """
+    One league's live polling state and output files.
+
+    poll() fetches the current week's box scores and writes a delta when anything
+    changed; the League and the base records are refreshed every `reconnect` seconds.
+    """
+
+    def __init__(self, pipeline: LeagueStandings, out_dir: Path = LIVE_DIR, reconnect: float = LIVE_RECONNECT,
+                 compact: int = LIVE_COMPACT):
+        self.pipeline = pipeline
+        self.dir = Path(out_dir) / f"{pipeline.league_id}_{pipeline.year}"
+        self.reconnect, self.compact = reconnect, compact
+        self.connected, self.week, self.base = None, None, None
+        self.seq, self.deltas = 0, 0
+        self.snapshot = None
+
+    def connect(self):
+        pipeline = self.pipeline
+        pipeline.reset()
+        l = pipeline.league
+        cache = ScoreStore(pipeline.cache_dir, l.league_id, l.year) if pipeline.cache_dir else None
+        self.base = base_records(l, pipeline.overlays, cache, **pipeline.fetch_kwargs)
+        self.connected = time.time()
+        return l
+
+    def poll(self) -> dict:
+        """Poll once; returns the delta written, or the snapshot when one was (re)written, or None."""
+        rewrite = False
+        if self.connected is None or time.time() - self.connected > self.reconnect:
+            l = self.connect()
+            rewrite = l.current_week != self.week
+            self.week = l.current_week
+        l = self.pipeline.league
+
+        box_scores = fetch_week(l, self.week, self.pipeline.retries, self.pipeline.backoff)
+        counts_median = self.week in median_weeks(l)
+        live = project_week(l, self.base, live_scores(box_scores), counts_median, self.pipeline.tiebreaks)
+        live = json.loads(dumps_compact(live))
+        instrument.count("live.poll")
+
+        self.seq += 1
+        updated = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if rewrite or self.snapshot is None or self.deltas >= self.compact:
+            return self.write_snapshot(live, updated)
+
+        delta = {"seq": self.seq, "updated": updated}
+        for key in ("median", "projected_median"):
+            if live[key] != self.snapshot[key]:
+                delta[key] = live[key]
+        changes = row_changes(self.snapshot["teams"], live["teams"], "Team ID")
+        if changes:
+            delta["teams"] = changes
+        if len(delta) == 2:
+            self.seq -= 1
+            return None
+
+        with open(self.dir / "deltas.jsonl", "ab") as f:
+            f.write(dumps_compact(delta) + b"\n")
+        self.snapshot = live
+        self.deltas += 1
+        instrument.count("live.delta")
+        return delta
+
+    def write_snapshot(self, live: dict, updated: str) -> dict:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "seq": self.seq, "week": self.week, "updated": updated,
+            "median": live["median"], "projected_median": live["projected_median"],
+            "teams": columnar(live["teams"], LIVE_COLUMNS),
+        }
+        # Snapshot first: a client that sees no deltas then still has current data
+        tmp = self.dir / "live.json.tmp"
+        tmp.write_bytes(dumps_compact(snapshot))
+        tmp.replace(self.dir / "live.json")
+        (self.dir / "deltas.jsonl").write_bytes(b"")
+        self.snapshot, self.deltas = live, 0
+        instrument.count("live.snapshot")
+        return snapshot
+
+
+def poll_forever(leagues: list, interval: float = LIVE_INTERVAL, concurrency: int = 4, rounds: int = None):
+    """Poll every league each `interval` seconds, `concurrency` at a time; rounds=None runs until stopped."""
+    def poll(live: LiveLeague):
+        try:
+            live.poll()
+        except Exception as e:
+            print(f"[WARN] League {live.pipeline.league_id} ({live.pipeline.year}) poll failed: {e}")
+
+    instrument.gauge("live_leagues", len(leagues))
+    done = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while rounds is None or done < rounds:
+            start = time.monotonic()
+            list(pool.map(poll, leagues))
+            done += 1
+            if rounds is None or done < rounds:
+                time.sleep(max(0.0, interval - (time.monotonic() - start)))
+
+
+# --- CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Poll live scores and write projected standings as deltas.")
+    parser.add_argument("--leagues", type=Path, help="JSON list of leagues in batch.py's format (default: GetLeagueData.py's league)")
+    parser.add_argument("--out-dir", type=Path, default=LIVE_DIR)
+    parser.add_argument("--interval", type=float, default=LIVE_INTERVAL, help="seconds between polls")
+    parser.add_argument("--rounds", type=int, help="stop after this many polls (default: run until stopped)")
+    parser.add_argument("--compact", type=int, default=LIVE_COMPACT, help="deltas written before the snapshot is rewritten")
+    parser.add_argument("--concurrency", type=int, default=4, help="leagues polled at once")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max ESPN requests per second across all leagues")
+    parser.add_argument("--burst", type=int, default=RATE_BURST, help="requests allowed in a burst above --rate")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port (needs prometheus-client)")
+    args = parser.parse_args()
+
+    entries = load_leagues(args.leagues) if args.leagues else [configured_league()]
+    start_metrics(args.metrics_port)
+
+    session = make_session(args.concurrency * FETCH_WORKERS, HTTP2)
+    rate_limiter = RateLimiter(args.rate, args.burst)
+    leagues = [
+        LiveLeague(make_standings(entry, session, rate_limiter), args.out_dir, compact=args.compact)
+        for entry in entries
+    ]
+    print(f"Polling {len(leagues)} league(s) every {args.interval:g}s into {args.out_dir}")
+    try:
+        poll_forever(leagues, args.interval, args.concurrency, args.rounds)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
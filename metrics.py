@@ -0,0 +1,110 @@
+import re
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+import instrument
+
+try:
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+except ImportError:  # optional: without it no metrics are exported
+    CollectorRegistry = None
+
+METRIC_PREFIX = "standings"
+
+# Seconds; ESPN requests are usually tens of milliseconds, a cold box score week up to a few seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def metric_name(name: str) -> str:
+    """"score_store.hit" -> "score_store_hit": Prometheus names allow only [a-zA-Z0-9_:]."""
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+class PrometheusExporter:
+    """
+    instrument recorder that feeds Prometheus metrics, attached with instrument.attach().
+
+    Requests become standings_requests_total{endpoint,status}, the latency histogram
+    standings_request_seconds{endpoint} and standings_response_bytes_total{endpoint};
+    stages the histogram standings_stage_seconds{stage}; instrument.count() events the
+    counter standings_events_total{event} (cache hits and misses, retries);
+    instrument.observe() timings a histogram standings_<name>_seconds with the given
+    labels (standings_box_scores_seconds{week}); instrument.gauge() values the gauge
+    standings_<name>.
+    """
+
+    def __init__(self, registry=None):
+        if CollectorRegistry is None:
+            raise ImportError("prometheus_client is required for metrics (pip install prometheus-client)")
+        self.registry = registry or CollectorRegistry()
+        self.requests = Counter(f"{METRIC_PREFIX}_requests", "ESPN requests", ["endpoint", "status"],
+                                registry=self.registry)
+        self.request_seconds = Histogram(f"{METRIC_PREFIX}_request_seconds", "ESPN request latency", ["endpoint"],
+                                         buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.response_bytes = Counter(f"{METRIC_PREFIX}_response_bytes", "ESPN response bytes", ["endpoint"],
+                                      registry=self.registry)
+        self.stage_seconds = Histogram(f"{METRIC_PREFIX}_stage_seconds", "Pipeline stage duration", ["stage"],
+                                       buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.events = Counter(f"{METRIC_PREFIX}_events", "Cache hits and misses, retries and other events", ["event"],
+                              registry=self.registry)
+        # Created on first use: {name: metric}
+        self.timings, self.gauges = {}, {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        with self.stage_seconds.labels(name).time():
+            yield
+
+    def record_request(self, endpoint: str, seconds: float, size: int, status: int):
+        self.requests.labels(endpoint, str(status)).inc()
+        self.request_seconds.labels(endpoint).observe(seconds)
+        self.response_bytes.labels(endpoint).inc(size)
+
+    def observe(self, name: str, seconds: float, **labels):
+        with self.lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram(
+                    f"{METRIC_PREFIX}_{metric_name(name)}_seconds", f"{name} duration", sorted(labels),
+                    buckets=LATENCY_BUCKETS, registry=self.registry,
+                )
+        (histogram.labels(**{k: str(v) for k, v in labels.items()}) if labels else histogram).observe(seconds)
+
+    def count(self, name: str, n: int = 1):
+        self.events.labels(name).inc(n)
+
+    def gauge(self, name: str, value: float):
+        with self.lock:
+            gauge = self.gauges.get(name)
+            if gauge is None:
+                gauge = self.gauges[name] = Gauge(f"{METRIC_PREFIX}_{metric_name(name)}", name, registry=self.registry)
+        gauge.set(value)
+
+    def serve(self, port: int, addr: str = "127.0.0.1"):
+        """Expose /metrics on a background thread for as long as the process runs."""
+        start_http_server(port, addr=addr, registry=self.registry)
+        print(f"Metrics served on http://{addr}:{port}/metrics")
+
+    def write_textfile(self, path: Path):
+        """Write the metrics for node_exporter's textfile collector (atomically, as it requires)."""
+        write_to_textfile(str(path), self.registry)
+
+
+def start_metrics(port: int = None, textfile: Path = None):
+    """
+    Attach a PrometheusExporter when a port or textfile is given and return it, else None.
+
+    Nothing is attached (so every instrument hook stays a no-op) when metrics are off or
+    prometheus_client is not installed.
+    """
+    if port is None and textfile is None:
+        return None
+    if CollectorRegistry is None:
+        print("[WARN] prometheus_client is not installed, metrics are disabled")
+        return None
+    exporter = PrometheusExporter()
+    if port is not None:
+        exporter.serve(port)
+    instrument.attach(exporter)
+    return exporter
@@ -0,0 +1,191 @@
+import json
+import difflib
+import hashlib
+from pathlib import Path
+from espn_api.football import League
+import instrument
+from espn_client import connect_league, fetch_status
+from fetching import ScoreStore, load_weekly_scores, retry_call
+from standings import (
+    DEFAULT_TIEBREAKS, median_weeks, get_median_records, build_teams_data,
+    load_overlays, dumps_teams, all_play_records, add_all_play
+)
+from simulate import build_season, playoff_odds, add_playoff_odds
+from publish import content_hash
+
+# Code and config the standings depend on besides ESPN's data (see input_hashes)
+SOURCE_DIR = Path(__file__).parent
+
+
+# --- Build Standings ---
+def full_rebuild(l: League, overlays: list = (), tiebreaks=DEFAULT_TIEBREAKS, audit: list = None, **fetch_kwargs):
+    """Standings rows rebuilt from every week's box scores; returns (teams_data, weekly_scores)."""
+    with instrument.stage("median"):
+        weekly_scores = load_weekly_scores(l, median_weeks(l), **fetch_kwargs)
+        median_records = get_median_records(l, weekly_scores=weekly_scores)
+    return build_teams_data(l, median_records, overlays, tiebreaks, audit), weekly_scores
+
+
+def incremental_build(l: League, cache_dir: Path, overlays: list = (), tiebreaks=DEFAULT_TIEBREAKS, audit: list = None,
+                      cache: ScoreStore = None, **fetch_kwargs):
+    """
+    Standings rows from the score store's finalized weeks plus newly finished and live
+    weeks; returns (teams_data, weekly_scores). Each week is loaded (and checked for a
+    stat correction) once, and the median records are folded from those scores.
+    """
+    with instrument.stage("median"):
+        cache = cache or ScoreStore(cache_dir, l.league_id, l.year)
+        weekly_scores = load_weekly_scores(l, median_weeks(l), cache, **fetch_kwargs)
+        median_records = get_median_records(l, weekly_scores=weekly_scores)
+    return build_teams_data(l, median_records, overlays, tiebreaks, audit), weekly_scores
+
+
+# --- Analytics ---
+def add_analytics(l: League, teams_data: list, weekly_scores: dict, sim_count: int = 100_000, sim_seed=None,
+                  store: ScoreStore = None, tiebreaks=DEFAULT_TIEBREAKS):
+    """
+    Add the all-play and playoff odds columns; returns the Season used for the odds.
+    Simulated seeds are ranked by the same tiebreaks as the rows.
+    """
+    with instrument.stage("all_play"):
+        add_all_play(teams_data, l, all_play_records(l, weekly_scores, store))
+    with instrument.stage("playoff_odds"):
+        season = build_season(l, teams_data, weekly_scores, store, tiebreaks)
+        add_playoff_odds(teams_data, l, playoff_odds(season, sim_count, sim_seed))
+    return season
+
+
+# --- Change Pre-check ---
+def status_fingerprint(data: dict) -> dict:
+    """The parts of a fetch_status response the standings depend on."""
+    status = data.get("status", {})
+    return {
+        "period": [data.get("scoringPeriodId"), status.get("currentMatchupPeriod"), status.get("latestScoringPeriod")],
+        "schedule": [
+            [m.get("id"), m.get("winner")] + [
+                (m.get(side) or {}).get(key) for side in ("home", "away") for key in ("teamId", "totalPoints")
+            ]
+            for m in data.get("schedule", [])
+        ],
+        "teams": [
+            [
+                t.get("id"), t.get("name"), t.get("logo"), t.get("owners"), t.get("record", {}).get("overall"),
+                t.get("transactionCounter", {}).get("acquisitionBudgetSpent"),
+            ]
+            for t in data.get("teams", [])
+        ],
+    }
+
+
+def input_hashes(overlays: list) -> dict:
+    """sha256 of the pipeline's source files and the adjustment overlays, by path."""
+    paths = sorted(SOURCE_DIR.glob("*.py")) + [o.path for o in overlays]
+    return {str(p): hashlib.sha256(p.read_bytes()).hexdigest() for p in paths}
+
+
+# --- League Standings ---
+class LeagueStandings:
+    """
+    The standings pipeline for one league, connecting to ESPN only on first use.
+
+    Pass league= to reuse an existing League (or any League-like object) instead of
+    connecting; the remaining keyword arguments are forwarded to connect_league.
+    adjustments are overlay files or directories (see standings.Overlay); the audit of
+    the last build's changes is kept in .audit.
+    """
+
+    def __init__(self, league_id: int = None, year: int = None, swid: str = None, espn_s2: str = None, *,
+                 league: League = None, cache_dir: Path = None, adjustments=(),
+                 tiebreaks=DEFAULT_TIEBREAKS, retries: int = 3, backoff: float = 1.0, fetch_workers: int = 1,
+                 **connect_kwargs):
+        self.league_id, self.year = league_id, year
+        self.swid, self.espn_s2 = swid, espn_s2
+        self.cache_dir, self.tiebreaks = cache_dir, tiebreaks
+        self.adjustments = adjustments
+        self.overlays = load_overlays(adjustments)
+        self.audit = []
+        self.retries, self.backoff = retries, backoff
+        self.fetch_kwargs = {"max_workers": fetch_workers, "retries": retries, "backoff": backoff}
+        self.connect_kwargs = connect_kwargs
+        self._league = league
+        self.season = None
+        self.weekly_scores = None
+        # The score store behind the last incremental build, read by the analytics
+        self.store = None
+        self._fingerprint = None
+
+    @property
+    def league(self) -> League:
+        if self._league is None:
+            with instrument.stage("connect"):
+                self._league = retry_call(
+                    connect_league, self.league_id, self.year, self.swid, self.espn_s2,
+                    retries=self.retries, backoff=self.backoff, **self.connect_kwargs
+                )
+        return self._league
+
+    def reset(self):
+        """Forget the fetched league and status and reread the overlays, so the next use sees current data."""
+        self._league = None
+        self._fingerprint = None
+        self.overlays = load_overlays(self.adjustments)
+
+    @property
+    def fingerprint_path(self) -> Path:
+        return Path(self.cache_dir) / f"fingerprint_{self.league_id}_{self.year}.json"
+
+    def fingerprint(self) -> str:
+        """Hash of ESPN's status (one small request) plus the local inputs."""
+        if self._fingerprint is None:
+            with instrument.stage("precheck"):
+                data = retry_call(
+                    fetch_status, self.league_id, self.year, self.swid, self.espn_s2,
+                    retries=self.retries, backoff=self.backoff, **self.connect_kwargs
+                )
+            self._fingerprint = content_hash({"espn": status_fingerprint(data), "inputs": input_hashes(self.overlays)})
+        return self._fingerprint
+
+    def unchanged(self) -> bool:
+        """True when nothing the standings depend on has changed since the last saved run."""
+        if self.cache_dir is None or not self.fingerprint_path.exists():
+            return False
+        with open(self.fingerprint_path) as f:
+            return json.load(f).get("fingerprint") == self.fingerprint()
+
+    def save_fingerprint(self, fingerprint: str = None):
+        """
+        Record this run's inputs; call once its outputs are published, passing the
+        fingerprint taken before building them.
+        """
+        if self.cache_dir is None:
+            return
+        self.fingerprint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.fingerprint_path, "w") as f:
+            json.dump({"league_id": self.league_id, "year": self.year,
+                       "fingerprint": fingerprint or self.fingerprint()}, f)
+
+    def build(self, full: bool = False):
+        """(teams_data, weekly_scores); incremental when a cache_dir is set, unless full=True."""
+        self.audit = []
+        if full or self.cache_dir is None:
+            self.store = None
+            return full_rebuild(self.league, self.overlays, self.tiebreaks, self.audit, **self.fetch_kwargs)
+        self.store = ScoreStore(self.cache_dir, self.league.league_id, self.league.year)
+        return incremental_build(self.league, self.cache_dir, self.overlays, self.tiebreaks, self.audit, self.store,
+                                 **self.fetch_kwargs)
+
+    def verify(self) -> list:
+        """Unified diff of the incremental build against a full rebuild; empty when they match."""
+        teams_data, _ = self.build()
+        full, _ = self.build(full=True)
+        return list(difflib.unified_diff(
+            dumps_teams(full).splitlines(), dumps_teams(teams_data).splitlines(),
+            "full rebuild", "incremental", lineterm=""
+        ))
+
+    def standings(self, full: bool = False, sim_count: int = 100_000, sim_seed=None) -> list:
+        """Published standings rows, with the all-play and playoff odds columns."""
+        teams_data, self.weekly_scores = self.build(full)
+        self.season = add_analytics(self.league, teams_data, self.weekly_scores, sim_count, sim_seed, self.store,
+                                    self.tiebreaks)
+        return teams_data
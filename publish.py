@@ -0,0 +1,148 @@
+import os
+import gzip
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+from standings import encode_json, week_median_results
+
+try:
+    import brotli
+except ImportError:  # optional: without it only the .gz variants are written
+    brotli = None
+
+# Per-view files for the page, next to the full LeagueData.json
+VIEWS_DIR = Path("data")
+
+# Columns of each view, in the order index.html renders them
+STANDINGS_COLUMNS = (
+    "Rank", "Team", "Overall Record", "Win %", "Matchup Record", "Median Score Record", "GB", "Playoff %",
+    "PF", "PA", "All-Play Record", "Expected Wins", "Luck", "Acquisition Budget",
+)
+ODDS_COLUMNS = ("Rank", "Team", "Playoff %", "Bye %", "First Place %")
+
+
+# --- Compact Encoding ---
+def columnar(rows: list, columns=None) -> dict:
+    """Rows as {"columns": [...], "data": [[column values], ...]}: each key written once."""
+    columns = list(columns if columns is not None else (rows[0].keys() if rows else ()))
+    return {"columns": columns, "data": [[row.get(c) for row in rows] for c in columns]}
+
+
+def dumps_compact(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=encode_json).encode()
+
+
+def write_precompressed(path: Path, body: bytes) -> list:
+    """Write body plus .gz (and .br when brotli is installed) copies for static serving; returns the paths."""
+    variants = {path: body}
+    # mtime=0 keeps the gzip bytes identical for identical input
+    variants[path.with_name(path.name + ".gz")] = gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants[path.with_name(path.name + ".br")] = brotli.compress(body, quality=11)
+    for variant, data in variants.items():
+        variant.write_bytes(data)
+    return list(variants)
+
+
+# --- Views ---
+def standings_views(teams_data: list, team_ids: list = None) -> dict:
+    """
+    The compact standings and odds views. Given team_ids (in row order), the standings
+    view also carries a "Team ID" column, which live updates key rows by.
+    """
+    columns = STANDINGS_COLUMNS if team_ids is None else ("Team ID",) + STANDINGS_COLUMNS
+    if team_ids is not None:
+        teams_data = [{"Team ID": team_id, **row} for team_id, row in zip(team_ids, teams_data)]
+    return {
+        "standings": columnar(teams_data, columns),
+        "odds": columnar(teams_data, ODDS_COLUMNS),
+    }
+
+
+def median_view(l, teams_data: list, weekly_scores: dict) -> dict:
+    """Each played week's median score, plus every team's record and week-by-week results ("W"/"L"/"-") against it."""
+    weeks = {w: week_median_results(entries) for w, entries in weekly_scores.items()}
+    weeks = {w: results for w, results in weeks.items() if results}
+    records = {row["Team"]: row["Median Score Record"] for row in teams_data}
+    return {
+        "weeks": list(weeks),
+        "medians": [round(float(np.median([s for _, s in weekly_scores[w]])), 2) for w in weeks],
+        "teams": columnar([
+            {
+                "Team": t.team_name,
+                "Median Score Record": records.get(t.team_name),
+                "Results": "".join(results.get(t.team_id, "-") for results in weeks.values()),
+            }
+            for t in l.teams
+        ]),
+    }
+
+
+def row_changes(previous: list, current: list, key: str = "Team") -> dict:
+    """{row[key]: {column: new value}} for every value that differs between two lists of JSON-ready rows."""
+    before = {row[key]: row for row in previous}
+    changes = {}
+    for row in current:
+        old = before.get(row[key], {})
+        changed = {k: v for k, v in row.items() if old.get(k) != v}
+        if changed:
+            changes[str(row[key])] = changed
+    return changes
+
+
+def write_views(views: dict, out_dir: Path = VIEWS_DIR) -> list:
+    """Write each view as <out_dir>/<name>.json (compact) plus compressed copies; returns every path written."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, view in views.items():
+        paths.extend(write_precompressed(out_dir / f"{name}.json", dumps_compact(view)))
+    return paths
+
+
+# --- Change Detection ---
+# Hash of the last published content plus each published file's hash
+MANIFEST_FILE = Path("manifest.json")
+
+
+def canonical_json(payload, indent: int = None) -> str:
+    """
+    payload as canonical JSON: sorted keys, and no whitespace unless indent is given.
+    content_hash and the published files both go through it, so equal content is
+    written as equal bytes.
+    """
+    separators = (",", ":") if indent is None else (",", ": ")
+    return json.dumps(payload, sort_keys=True, indent=indent, separators=separators, default=encode_json)
+
+
+def published_rows(teams_data: list) -> list:
+    """Standings rows in their published order: by rank, then team name (not ESPN's team order)."""
+    return sorted(teams_data, key=lambda row: (row["Rank"], row["Team"]))
+
+
+def content_hash(payload) -> str:
+    """sha256 of the canonical JSON form of payload (see canonical_json)."""
+    return hashlib.sha256(canonical_json(payload).encode()).hexdigest()
+
+
+def published_hash(manifest: Path = MANIFEST_FILE):
+    if not manifest.exists():
+        return None
+    with open(manifest) as f:
+        return json.load(f).get("content")
+
+
+def write_manifest(content: str, paths, manifest: Path = MANIFEST_FILE):
+    files = {str(p): hashlib.sha256(Path(p).read_bytes()).hexdigest() for p in sorted(map(str, paths))}
+    with open(manifest, "w") as f:
+        json.dump({"content": content, "files": files}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def set_job_output(name: str, value: str):
+    """Expose a step output to later GitHub Actions steps; does nothing outside Actions."""
+    path = os.getenv("GITHUB_OUTPUT")
+    if path:
+        with open(path, "a") as f:
+            f.write(f"{name}={value}\n")
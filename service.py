@@ -0,0 +1,419 @@
+"""
+Standings service: keeps each league's standings in memory and serves them over HTTP.
+
+    python service.py                                  # the league configured in GetLeagueData.py
+    python service.py --leagues leagues.json --port 8000 --refresh 300
+
+    GET  /standings   /median   /odds   /history      (?league=<id>&year=<year> with several leagues)
+    GET  /leagues                                     every league served, with its last refresh
+    GET  /events                                      server-sent standings updates (see below)
+    POST /refresh?league=<id>&year=<year>[&force=1]   refresh now instead of waiting for the schedule
+    GET  /                                            index.html, reading data/standings.json from here
+
+leagues.json uses batch.py's format. Every --refresh seconds each league checks ESPN's
+status (one small request, see pipeline.LeagueStandings.fingerprint) and only rebuilds
+when something changed. Refreshes are single-flight: requests arriving while one runs
+wait for it and share its result instead of fetching again. Responses carry an ETag,
+so clients revalidating with If-None-Match get an empty 304 until the data changes,
+and are gzip-compressed for clients that accept it.
+
+/events?league=&year= is a server-sent event stream. It opens with a "standings"
+event (the full standings view, with a "Team ID" column) and then sends a "patch"
+event after each refresh that changed anything: {"changes": {team_id: {column:
+value}}, "order": [team_id, ...]}, holding only the changed cells (a rename is just a
+changed "Team") and the new row order. A full "standings" event is sent instead when
+teams were added or removed. index.html subscribes when served from here.
+"""
+import gzip
+import json
+import time
+import queue
+import hashlib
+import argparse
+import threading
+import instrument
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from espn_client import RateLimiter, make_session
+from pipeline import LeagueStandings, SOURCE_DIR
+from publish import STANDINGS_COLUMNS, standings_views, median_view, columnar, dumps_compact, row_changes
+from history import SeasonStore, backfill, history_data, history_view
+from metrics import start_metrics
+from batch import load_leagues
+from GetLeagueData import (
+    FETCH_WORKERS, HTTP2, RATE_LIMIT, RATE_BURST, SIM_COUNT, SIM_SEED, configured_league, make_standings
+)
+
+SERVICE_PORT = 8000
+# Seconds between status checks, and between history rebuilds (past seasons never change)
+SERVICE_REFRESH = 300
+HISTORY_REFRESH = 6 * 3600
+# Seconds between comment lines on idle event streams, so proxies keep them open
+EVENTS_KEEPALIVE = 15
+
+# The page and its stylesheet, served from the repository
+STATIC_FILES = {"": "index.html", "index.html": "index.html", "styles.css": "styles.css"}
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".css": "text/css; charset=utf-8"}
+
+
+# --- Single Flight ---
+class SingleFlight:
+    """Runs fn at most once at a time; callers arriving while it runs wait for and share its result."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flight = None
+
+    def do(self, fn):
+        with self.lock:
+            flight, leader = self.flight, self.flight is None
+            if leader:
+                flight = self.flight = Future()
+        if not leader:
+            instrument.count("service.refresh_shared")
+            return flight.result()
+
+        try:
+            flight.set_result(fn())
+        except Exception as e:
+            flight.set_exception(e)
+        finally:
+            with self.lock:
+                self.flight = None
+        return flight.result()
+
+
+# --- Event Streams ---
+class Broadcaster:
+    """
+    Server-sent events fanned out to every subscriber through its own bounded queue.
+
+    A subscriber too slow to keep up gets None instead of the events it missed, which
+    ends its stream; the browser then reconnects and starts again from a full snapshot.
+    """
+
+    def __init__(self, backlog: int = 32):
+        self.backlog = backlog
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(self.backlog)
+        with self.lock:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def publish(self, event: str, seq: int, data: bytes):
+        message = sse_message(event, seq, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                self.unsubscribe(q)
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(None)
+
+
+def sse_message(event: str, seq: int, data: bytes) -> bytes:
+    return b"event: %s\nid: %d\ndata: %s\n\n" % (event.encode(), seq, data)
+
+
+# --- Snapshots ---
+class View:
+    """One served document: compact JSON body, its gzip copy and ETag."""
+
+    def __init__(self, data):
+        self.body = dumps_compact(data)
+        self.gzip = gzip.compress(self.body, mtime=0)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+
+class LeagueService:
+    """
+    A league's standings views held in memory, rebuilt by refresh().
+
+    .views maps view name to View and is replaced whole, so readers never see a
+    half-built refresh. History is rebuilt separately and much less often, but both
+    share the one LeagueStandings: pipeline_lock serializes every use of it, so the
+    two never connect to ESPN at the same time or see a half-reset pipeline. Each
+    rebuild's standings changes are published to .events (see push()).
+    """
+
+    def __init__(self, pipeline: LeagueStandings, sim_count: int = SIM_COUNT, sim_seed=SIM_SEED,
+                 history_workers: int = 4):
+        self.pipeline = pipeline
+        self.sim_count, self.sim_seed = sim_count, sim_seed
+        self.history_workers = history_workers
+        self.views, self.fingerprint = {}, None
+        self.refreshed, self.changed, self.history_refreshed = None, None, None
+        self.error = None
+        self.flight, self.history_flight = SingleFlight(), SingleFlight()
+        self.pipeline_lock = threading.Lock()
+        self.rows, self.seq, self.events = None, 0, Broadcaster()
+
+    @property
+    def key(self) -> tuple:
+        return self.pipeline.league_id, self.pipeline.year
+
+    def refresh(self, force: bool = False) -> dict:
+        return self.flight.do(lambda: self._refresh(force))
+
+    def _refresh(self, force: bool) -> dict:
+        with self.pipeline_lock:
+            return self._rebuild(force)
+
+    def _rebuild(self, force: bool) -> dict:
+        pipeline = self.pipeline
+        pipeline.reset()
+        try:
+            fingerprint = pipeline.fingerprint()
+            if force or fingerprint != self.fingerprint or "standings" not in self.views:
+                with instrument.stage("service_refresh"):
+                    teams_data = pipeline.standings(sim_count=self.sim_count, sim_seed=self.sim_seed)
+                    team_ids = [t.team_id for t in pipeline.league.teams]
+                    views = standings_views(teams_data, team_ids)
+                    views["median"] = median_view(pipeline.league, teams_data, pipeline.weekly_scores)
+                self.views = {**self.views, **{name: View(data) for name, data in views.items()}}
+                self.fingerprint, self.changed = fingerprint, time.time()
+                self.push(json.loads(dumps_compact([
+                    {"Team ID": team_id, **{c: row.get(c) for c in STANDINGS_COLUMNS}}
+                    for team_id, row in zip(team_ids, teams_data)
+                ])))
+                instrument.count("service.rebuild")
+            self.error = None
+        except Exception as e:
+            # Keep serving the last good views
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"[WARN] League {self.key[0]} ({self.key[1]}) refresh failed: {e}")
+        self.refreshed = time.time()
+        return self.views
+
+    def push(self, rows: list):
+        """
+        Publish what changed since the last rebuild's rows: a patch, or the full view when
+        the teams differ. Rows are keyed by "Team ID", so a renamed team is patched in place.
+        """
+        previous, self.rows = self.rows, rows
+        if previous is None:
+            return
+        if sorted(r["Team ID"] for r in previous) != sorted(r["Team ID"] for r in rows):
+            self.seq += 1
+            self.events.publish("standings", self.seq, dumps_compact(columnar(rows)))
+            return
+        changes = row_changes(previous, rows, key="Team ID")
+        if not changes:
+            return
+        self.seq += 1
+        patch = {"changes": changes, "order": [r["Team ID"] for r in rows]}
+        self.events.publish("patch", self.seq, dumps_compact(patch))
+        instrument.count("service.patch")
+
+    def refresh_history(self) -> dict:
+        return self.history_flight.do(self._refresh_history)
+
+    def _refresh_history(self) -> dict:
+        pipeline = self.pipeline
+        store = SeasonStore(Path(pipeline.cache_dir) / "history", pipeline.league_id)
+        try:
+            with instrument.stage("service_history"):
+                # The League the last standings refresh connected (or a new one), taken under the
+                # lock; the season backfill then runs on it without holding up standings refreshes
+                with self.pipeline_lock:
+                    league, overlays, weekly_scores = pipeline.league, pipeline.overlays, pipeline.weekly_scores
+                years = range(min(league.previousSeasons + [pipeline.year]), pipeline.year + 1)
+                seasons = backfill(
+                    pipeline.league_id, years, store, self.history_workers, league,
+                    {pipeline.year: overlays}, {pipeline.year: weekly_scores} if weekly_scores else None,
+                    swid=pipeline.swid, espn_s2=pipeline.espn_s2, retries=pipeline.retries, backoff=pipeline.backoff,
+                    **pipeline.connect_kwargs
+                )
+                view = View(history_view(history_data(pipeline.league_id, seasons)))
+            self.views = {**self.views, "history": view}
+        except Exception as e:
+            print(f"[WARN] League {self.key[0]} history refresh failed: {e}")
+        self.history_refreshed = time.time()
+        return self.views
+
+    def view(self, name: str):
+        """The named View, building it first if this league has none yet (None if it still cannot)."""
+        if name == "history":
+            if self.history_refreshed is None or time.time() - self.history_refreshed > HISTORY_REFRESH:
+                self.refresh_history()
+        elif name not in self.views:
+            self.refresh()
+        return self.views.get(name)
+
+    def status(self) -> dict:
+        return {
+            "league_id": self.key[0], "year": self.key[1],
+            "refreshed": iso_time(self.refreshed), "changed": iso_time(self.changed), "error": self.error,
+        }
+
+
+def iso_time(t: float):
+    return None if t is None else time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+
+
+# --- Server ---
+class StandingsServer(ThreadingHTTPServer):
+    daemon_threads = True
+    VIEWS = ("standings", "median", "odds", "history")
+
+    def __init__(self, address, services: list):
+        super().__init__(address, StandingsHandler)
+        self.services = {service.key: service for service in services}
+
+    def find(self, query: dict):
+        """The service named by ?league=&year=, or the only one when they are left out."""
+        league = query.get("league", [None])[0]
+        year = query.get("year", [None])[0]
+        matches = [
+            s for (league_id, y), s in self.services.items()
+            if (league is None or str(league_id) == league) and (year is None or str(y) == year)
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def refresh_forever(self, interval: float):
+        while True:
+            for service in self.services.values():
+                service.refresh()
+            time.sleep(interval)
+
+
+class StandingsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip("/")
+        if name in STATIC_FILES:
+            path = SOURCE_DIR / STATIC_FILES[name]
+            return self.reply(200, path.read_bytes(), {"Cache-Control": "no-cache"}, CONTENT_TYPES[path.suffix])
+        if name == "leagues":
+            return self.reply(200, json.dumps([s.status() for s in self.server.services.values()]).encode())
+        if name == "events":
+            return self.stream(parse_qs(url.query))
+        # The page's static-hosting paths (data/<view>.json) map onto the views
+        if name.startswith("data/") and name.endswith(".json"):
+            name = name[len("data/"):-len(".json")]
+        if name not in self.server.VIEWS:
+            return self.reply(404, b'{"message": "not found"}')
+
+        service = self.server.find(parse_qs(url.query))
+        if service is None:
+            return self.reply(404, b'{"message": "unknown or ambiguous league, pass ?league=&year="}')
+        view = service.view(name)
+        if view is None:
+            return self.reply(503, json.dumps({"message": "no data yet", "error": service.error}).encode())
+
+        headers = {"ETag": view.etag, "Cache-Control": "no-cache"}
+        if_none_match = {t.strip() for t in self.headers.get("If-None-Match", "").split(",")}
+        if view.etag in if_none_match or "*" in if_none_match:
+            instrument.count("service.not_modified")
+            return self.reply(304, b"", headers)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            return self.reply(200, view.gzip, {**headers, "Content-Encoding": "gzip"})
+        self.reply(200, view.body, headers)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.strip("/") != "refresh":
+            return self.reply(404, b'{"message": "not found"}')
+        query = parse_qs(url.query)
+        service = self.server.find(query)
+        if service is None:
+            return self.reply(404, b'{"message": "unknown or ambiguous league, pass ?league=&year="}')
+        service.refresh(force=query.get("force", ["0"])[0] == "1")
+        self.reply(200, json.dumps(service.status()).encode())
+
+    def stream(self, query: dict):
+        """Hold the connection open as a server-sent event stream of the league's standings."""
+        service = self.server.find(query)
+        if service is None:
+            return self.reply(404, b'{"message": "unknown or ambiguous league, pass ?league=&year="}')
+        # Subscribed first, so no patch falls between the snapshot and the stream
+        events = service.events.subscribe()
+        view = service.view("standings")
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            if view is not None:
+                self.wfile.write(sse_message("standings", service.seq, view.body))
+                self.wfile.flush()
+            while True:
+                try:
+                    message = events.get(timeout=EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            service.events.unsubscribe(events)
+
+    def reply(self, status: int, body: bytes, headers: dict = None, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# --- CLI ---
+def league_services(entries: list, sim_count: int = SIM_COUNT, rate: float = RATE_LIMIT,
+                    burst: int = RATE_BURST) -> list:
+    """One LeagueService per entry, all on one session behind one rate limiter."""
+    session = make_session(len(entries) * FETCH_WORKERS, HTTP2)
+    rate_limiter = RateLimiter(rate, burst)
+    return [LeagueService(make_standings(entry, session, rate_limiter), sim_count) for entry in entries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve league standings from memory, refreshed on a schedule.")
+    parser.add_argument("--leagues", type=Path, help="JSON list of leagues in batch.py's format (default: GetLeagueData.py's league)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--refresh", type=float, default=SERVICE_REFRESH, help="seconds between scheduled refreshes")
+    parser.add_argument("--sims", type=int, default=SIM_COUNT, help="playoff odds simulations per refresh")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max ESPN requests per second across all leagues")
+    parser.add_argument("--burst", type=int, default=RATE_BURST, help="requests allowed in a burst above --rate")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this local port (needs prometheus-client)")
+    args = parser.parse_args()
+
+    entries = load_leagues(args.leagues) if args.leagues else [configured_league()]
+    start_metrics(args.metrics_port)
+
+    server = StandingsServer((args.host, args.port), league_services(entries, args.sims, args.rate, args.burst))
+    threading.Thread(target=server.refresh_forever, args=(args.refresh,), daemon=True).start()
+    print(f"Serving {len(entries)} league(s) on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
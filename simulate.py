@@ -0,0 +1,344 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from espn_api.football import League
+from fetching import ScoreStore, is_week_final
+from standings import (
+    TeamRecord, TIEBREAKERS, DEFAULT_TIEBREAKS, LAST_MEDIAN_WEEK, week_median_results, head_to_head_wins,
+)
+
+# Simulations are run in chunks of this size to keep the score array small
+SIM_CHUNK = 20_000
+
+# Projection batches: each batch gets its own SeedSequence child, so results depend
+# only on the seed and batch size, never on how many worker processes run them
+PROJECTION_BATCH = 10_000
+
+# Tiebreakers that read the tied group's head-to-head results from their context
+GROUP_TIEBREAKS = {"h2h"}
+
+
+# --- Season Inputs ---
+class Season:
+    """
+    Everything the simulator needs about the rest of a season, as arrays indexed by team.
+
+    base_wins/base_losses/base_ties/base_pf and the base median record are the settled
+    standings (provisional results from a week still in progress are backed out, since
+    that week is simulated). history holds each team's completed weekly scores.
+    remaining is a list of (home_idx, away_idx, counts_median) per remaining week. The
+    top playoff_spots seeds make the playoffs (every team when not given) and the top
+    bye_spots skip the first round. Seeds are ranked by the tiebreaks chain, with
+    base_h2h ({(team_id, opponent_id): wins}) as the settled head-to-head results.
+    """
+
+    def __init__(self, team_ids, base_wins, base_losses, base_pf, history, remaining, base_ties=None,
+                 playoff_spots: int = None, bye_spots: int = 0, base_median_wins=None, base_median_losses=None,
+                 tiebreaks=DEFAULT_TIEBREAKS, base_h2h: dict = None):
+        self.team_ids = list(team_ids)
+        self.playoff_spots = len(self.team_ids) if playoff_spots is None else playoff_spots
+        self.bye_spots = bye_spots
+        self.tiebreaks = tuple(tiebreaks)
+        self.base_h2h = dict(base_h2h or {})
+        self.base_wins = np.asarray(base_wins, dtype=np.int32)
+        self.base_losses = np.asarray(base_losses, dtype=np.int32)
+        zeros = np.zeros_like(self.base_wins)
+        self.base_ties = zeros if base_ties is None else np.asarray(base_ties, dtype=np.int32)
+        self.base_median_wins = zeros if base_median_wins is None else np.asarray(base_median_wins, dtype=np.int32)
+        self.base_median_losses = zeros if base_median_losses is None else np.asarray(base_median_losses, dtype=np.int32)
+        self.base_pf = np.asarray(base_pf, dtype=np.float64)
+        self.history = [np.asarray(h, dtype=np.float64) for h in history]
+        self.remaining = remaining
+
+        scores = np.concatenate([h for h in self.history if h.size]) if any(h.size for h in self.history) else np.array([100.0])
+        league_mean, league_std = scores.mean(), scores.std() if scores.size > 1 else 20.0
+        self.mean = np.array([h.mean() if h.size else league_mean for h in self.history])
+        self.std = np.array([h.std(ddof=1) if h.size > 1 else league_std for h in self.history])
+
+
+def playoff_format(l: League) -> tuple:
+    """
+    (playoff_spots, bye_spots) from the league settings.
+
+    ESPN has no bye setting: its bracket is single elimination over the next power of
+    two, and the top seeds fill the empty slots, so 6 playoff teams get 2 byes and 4
+    or 8 get none.
+    """
+    spots = l.settings.playoff_team_count
+    return spots, (1 << (spots - 1).bit_length()) - spots if spots > 1 else 0
+
+
+def remaining_schedule(l: League) -> list:
+    """Undecided regular-season matchups as (home_idx, away_idx, counts_median) per week."""
+    index = {t.team_id: i for i, t in enumerate(l.teams)}
+    periods = {}
+    for t in l.teams:
+        for period, (opponent, outcome) in enumerate(zip(t.schedule, t.outcomes), 1):
+            if outcome != "U" or period > l.settings.reg_season_count:
+                continue
+            games = periods.setdefault(period, set())
+            if opponent is not t:
+                games.add(tuple(sorted((index[t.team_id], index[opponent.team_id]))))
+
+    return [
+        (
+            np.array([a for a, _ in sorted(games)], dtype=np.intp),
+            np.array([b for _, b in sorted(games)], dtype=np.intp),
+            1 < period <= LAST_MEDIAN_WEEK,
+        )
+        for period, games in sorted(periods.items())
+    ]
+
+
+def build_season(l: League, teams_data: list, weekly_scores: dict, store: ScoreStore = None,
+                 tiebreaks=DEFAULT_TIEBREAKS) -> Season:
+    """
+    Season inputs from the published rows (same order as l.teams) and {week: [[team_id, score], ...]}.
+
+    Completed weeks held in store are gathered from its memmap in one copy. tiebreaks
+    should be the chain the published rows were ranked by.
+    """
+    index = {t.team_id: i for i, t in enumerate(l.teams)}
+    wins = [row["Overall Record"].wins for row in teams_data]
+    losses = [row["Overall Record"].losses for row in teams_data]
+    ties = [row["Overall Record"].ties for row in teams_data]
+    median_wins = [row["Median Score Record"].wins for row in teams_data]
+    median_losses = [row["Median Score Record"].losses for row in teams_data]
+    pf = [row["PF"] for row in teams_data]
+
+    final = [week for week in weekly_scores if is_week_final(l, week)]
+    scores = np.full((len(final), len(l.teams)), np.nan)
+    stored = [row for row, week in enumerate(final) if store is not None and store.has(week)]
+    if stored:
+        store.copy_into(scores, stored, [final[row] for row in stored], list(index))
+        # Rounded like ScoreStore.get(), so the fits match a build from fetched scores
+        scores[stored] = np.round(scores[stored], 2)
+    for row, week in enumerate(final):
+        if row in stored:
+            continue
+        for team_id, score in weekly_scores[week]:
+            if team_id in index:
+                scores[row, index[team_id]] = score
+    history = [column[~np.isnan(column)] for column in scores.T]
+
+    for week, entries in weekly_scores.items():
+        if is_week_final(l, week):
+            continue
+        # In-progress week: its median result is provisional and gets simulated instead
+        for team_id, result in week_median_results(entries).items():
+            if result == "W":
+                wins[index[team_id]] -= 1
+                median_wins[index[team_id]] -= 1
+            elif result == "L":
+                losses[index[team_id]] -= 1
+                median_losses[index[team_id]] -= 1
+
+    return Season([t.team_id for t in l.teams], wins, losses, pf, history, remaining_schedule(l), ties,
+                  *playoff_format(l), base_median_wins=median_wins, base_median_losses=median_losses,
+                  tiebreaks=tiebreaks, base_h2h=head_to_head_wins(l))
+
+
+# --- Simulation ---
+def sample_normal(season: Season, rng, n: int, n_weeks: int) -> np.ndarray:
+    """Weekly scores drawn from each team's normal fit, shape (n, n_weeks, n_teams)."""
+    draws = rng.standard_normal((n, n_weeks, len(season.team_ids)))
+    return np.maximum(season.mean + season.std * draws, 0.0)
+
+
+def sample_history(season: Season, rng, n: int, n_weeks: int) -> np.ndarray:
+    """Weekly scores resampled from each team's own completed weeks, shape (n, n_weeks, n_teams)."""
+    scores = sample_normal(season, rng, n, n_weeks)
+    for i, h in enumerate(season.history):
+        if h.size:
+            scores[:, :, i] = h[rng.integers(0, h.size, size=(n, n_weeks))]
+    return scores
+
+
+def play_out(season: Season, scores: np.ndarray) -> dict:
+    """
+    Play the remaining weeks for a batch of sampled scores (n, weeks, teams).
+
+    Returns the final "wins", "losses", "ties", "median_wins", "median_losses" and "pf"
+    as (n, teams) arrays; the overall record includes the weekly median game where it
+    applies. A matchup with equal scores is a tie for both teams. When the tiebreaks
+    need them, "h2h" holds the matchup wins as (n, teams, opponents).
+    """
+    n, n_teams = scores.shape[0], len(season.team_ids)
+    wins, losses, ties, median_wins, median_losses = (
+        np.broadcast_to(base, (n, n_teams)).copy()
+        for base in (season.base_wins, season.base_losses, season.base_ties,
+                     season.base_median_wins, season.base_median_losses)
+    )
+    pf = season.base_pf + scores.sum(axis=1)
+    h2h = None
+    if GROUP_TIEBREAKS.intersection(season.tiebreaks):
+        index = {team_id: i for i, team_id in enumerate(season.team_ids)}
+        h2h = np.zeros((n, n_teams, n_teams), dtype=np.int32)
+        for (team_id, opponent_id), count in season.base_h2h.items():
+            if team_id in index and opponent_id in index:
+                h2h[:, index[team_id], index[opponent_id]] += count
+
+    for w, (home, away, counts_median) in enumerate(season.remaining):
+        week = scores[:, w, :]
+        home_won = week[:, home] > week[:, away]
+        away_won = week[:, home] < week[:, away]
+        tied = ~(home_won | away_won)
+        wins[:, home] += home_won
+        losses[:, home] += away_won
+        ties[:, home] += tied
+        wins[:, away] += away_won
+        losses[:, away] += home_won
+        ties[:, away] += tied
+        if h2h is not None:
+            h2h[:, home, away] += home_won
+            h2h[:, away, home] += away_won
+        if counts_median:
+            beat_median = week >= np.median(week, axis=1, keepdims=True)
+            wins += beat_median
+            losses += ~beat_median
+            median_wins += beat_median
+            median_losses += ~beat_median
+
+    results = {"wins": wins, "losses": losses, "ties": ties, "median_wins": median_wins,
+               "median_losses": median_losses, "pf": pf}
+    if h2h is not None:
+        results["h2h"] = h2h
+    return results
+
+
+def _rows(results: dict) -> list:
+    """Stand-in standings rows for the tiebreakers, holding one (n,) array per column."""
+    return [
+        {
+            "Overall Record": TeamRecord(results["wins"][:, i], results["losses"][:, i], results["ties"][:, i]),
+            "Median Score Record": TeamRecord(results["median_wins"][:, i], results["median_losses"][:, i]),
+            "PF": results["pf"][:, i],
+        }
+        for i in range(results["pf"].shape[1])
+    ]
+
+
+def seeds_from(season: Season, results: dict) -> np.ndarray:
+    """
+    0-based seed per team for each simulation, ranked by season.tiebreaks through
+    standings.TIEBREAKERS the same way the published standings are.
+
+    Each tiebreaker runs once on rows of (n,) arrays. Teams still level share a group
+    number, and the head-to-head counts given to a group tiebreaker only cover each
+    team's own group, as order_teams does when it recurses into a tied group.
+    """
+    rows = _rows(results)
+    n, n_teams = results["pf"].shape
+    group = np.zeros((n, n_teams), dtype=np.intp)
+    for name in season.tiebreaks:
+        context = None
+        if name in GROUP_TIEBREAKS:
+            h2h = results["h2h"] * (group[:, :, None] == group[:, None, :])
+            context = {
+                "team_ids": {id(row): i for i, row in enumerate(rows)},
+                "h2h": {(i, j): h2h[:, i, j] for i in range(n_teams) for j in range(n_teams) if i != j},
+            }
+        key = np.stack([np.broadcast_to(TIEBREAKERS[name](row, rows, context), n) for row in rows], axis=1)
+        # A team's new group is the number of teams now ranked ahead of it
+        same = group[:, None, :] == group[:, :, None]
+        ahead = (group[:, None, :] < group[:, :, None]) | (same & (key[:, None, :] > key[:, :, None]))
+        group = ahead.sum(axis=2)
+
+    # Teams level on the whole chain keep their input order, as in order_teams
+    order = np.lexsort((np.broadcast_to(np.arange(n_teams), group.shape), group), axis=-1)
+    seeds = np.empty_like(order)
+    np.put_along_axis(seeds, order, np.arange(n_teams), axis=1)
+    return seeds
+
+
+def playoff_odds(season: Season, n_sims: int = 100_000, seed=None) -> dict:
+    """Monte Carlo playoff, bye and first-place probabilities as {team_id: {...}}."""
+    rng = np.random.default_rng(seed)
+    n_teams = len(season.team_ids)
+    made = np.zeros(n_teams)
+    bye = np.zeros(n_teams)
+    first = np.zeros(n_teams)
+
+    for start in range(0, n_sims, SIM_CHUNK):
+        n = min(SIM_CHUNK, n_sims - start)
+        scores = sample_normal(season, rng, n, len(season.remaining))
+        seeds = seeds_from(season, play_out(season, scores))
+        made += (seeds < season.playoff_spots).sum(axis=0)
+        bye += (seeds < season.bye_spots).sum(axis=0)
+        first += (seeds == 0).sum(axis=0)
+
+    return {
+        team_id: {"playoff": made[i] / n_sims, "bye": bye[i] / n_sims, "first": first[i] / n_sims}
+        for i, team_id in enumerate(season.team_ids)
+    }
+
+
+# --- Standings Projection ---
+def _project_batch(season: Season, n: int, seed_seq: np.random.SeedSequence):
+    """One projection batch: per-team {(wins, losses, ties): count}, seed histogram and PF samples."""
+    rng = np.random.default_rng(seed_seq)
+    scores = sample_history(season, rng, n, len(season.remaining))
+    results = play_out(season, scores)
+    seeds = seeds_from(season, results)
+    n_teams = len(season.team_ids)
+    records = []
+    for i in range(n_teams):
+        record = np.stack([results["wins"][:, i], results["losses"][:, i], results["ties"][:, i]], axis=1)
+        triples, counts = np.unique(record, axis=0, return_counts=True)
+        records.append({(int(w), int(l), int(t)): int(c) for (w, l, t), c in zip(triples, counts)})
+    seed_hist = np.stack([np.bincount(seeds[:, i], minlength=n_teams) for i in range(n_teams)])
+    return records, seed_hist, results["pf"]
+
+
+def project_standings(season: Season, n_sims: int = 100_000, seed: int = 0,
+                      workers: int = 1, batch_size: int = PROJECTION_BATCH) -> dict:
+    """
+    Distribution of final records, seeds and PF per team, sampled from score history.
+
+    The work is split into fixed batches seeded from SeedSequence(seed).spawn(), then
+    sharded across a ProcessPoolExecutor. Batch results are combined in batch order,
+    so the output is bit-identical for a given seed and batch size at any worker count.
+    """
+    sizes = [min(batch_size, n_sims - start) for start in range(0, n_sims, batch_size)]
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([season] * len(sizes), sizes, seed_seqs)
+
+    if workers <= 1:
+        batches = list(map(_project_batch, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_project_batch, *args))
+
+    records = [{} for _ in season.team_ids]
+    for batch_records, _, _ in batches:
+        for team_records, counts in zip(records, batch_records):
+            for key, count in counts.items():
+                team_records[key] = team_records.get(key, 0) + count
+    seed_hist = sum(b[1] for b in batches)
+    pf = np.concatenate([b[2] for b in batches])
+
+    projection = {}
+    for i, team_id in enumerate(season.team_ids):
+        p10, p50, p90 = np.percentile(pf[:, i], [10, 50, 90])
+        projection[team_id] = {
+            "records": {
+                f"{w}-{l}-{t}": round(count / n_sims, 4)
+                for (w, l, t), count in sorted(records[i].items(), reverse=True)
+            },
+            "seeds": {s + 1: round(count / n_sims, 4) for s, count in enumerate(seed_hist[i]) if count},
+            "pf": {
+                "mean": round(float(pf[:, i].mean()), 2),
+                "p10": round(float(p10), 2),
+                "p50": round(float(p50), 2),
+                "p90": round(float(p90), 2),
+            },
+        }
+    return projection
+
+
+def add_playoff_odds(teams_data: list, l: League, odds: dict):
+    """Write the odds into the rows as percentages."""
+    for row, t in zip(teams_data, l.teams):
+        team_odds = odds[t.team_id]
+        row["Playoff %"] = round(100 * team_odds["playoff"], 1)
+        row["Bye %"] = round(100 * team_odds["bye"], 1)
+        row["First Place %"] = round(100 * team_odds["first"], 1)
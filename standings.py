@@ -0,0 +1,521 @@
+import re
+import json
+import difflib
+import numpy as np
+from pathlib import Path
+from espn_api.football import League
+import instrument
+from fetching import ScoreStore, load_weekly_scores, matchup_period
+
+
+# --- Helpers ---
+def normalize_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', (name or "").lower().strip())
+
+def to_float(v) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+# --- Team Resolution ---
+class TeamIndex:
+    """
+    Resolves any reference to a team - team_id, current or past name, owner id - to its
+    canonical key (the team_id), built once per league.
+
+    Names are normalized once, when added, so lookups are dict hits. Only when asked
+    (fuzzy=True) does a name with no exact match fall back to the closest known name
+    (memoized), and only if no other team's name comes within FUZZY_MARGIN of it.
+    """
+
+    FUZZY_CUTOFF = 0.8
+    FUZZY_MARGIN = 0.1
+
+    def __init__(self):
+        self.team_ids = []
+        self.ids, self.names, self.owners = set(), {}, {}
+        self._fuzzy = {}
+
+    @classmethod
+    def from_league(cls, l: League) -> "TeamIndex":
+        index = cls()
+        for t in l.teams:
+            index.add(t.team_id, t.team_name, owner_ids(t))
+        return index
+
+    def add(self, key, name: str = None, owners=()):
+        """Register a team (or more names and owners for a known key); first registration wins."""
+        if key not in self.ids:
+            self.ids.add(key)
+            self.team_ids.append(key)
+        if name:
+            self.names.setdefault(normalize_name(name), key)
+            self._fuzzy.clear()
+        for owner in owners:
+            self.owners.setdefault(owner, key)
+
+    def resolve(self, team_id=None, name: str = None, owner: str = None, fuzzy: bool = False):
+        """(key, matched_by) for the first reference that matches, or (None, None)."""
+        if team_id is not None and team_id in self.ids:
+            return team_id, "team_id"
+        if owner is not None and owner in self.owners:
+            return self.owners[owner], "owner"
+        if not name:
+            return None, None
+        norm = normalize_name(name)
+        if norm in self.names:
+            return self.names[norm], "name"
+        if not fuzzy:
+            return None, None
+        if norm not in self._fuzzy:
+            self._fuzzy[norm] = self._closest(norm)
+        key = self._fuzzy[norm]
+        return (key, "fuzzy") if key is not None else (None, None)
+
+    def _closest(self, norm: str):
+        """Key of the team whose best name scores FUZZY_CUTOFF or more and clearly beats every other team's."""
+        scores = {}
+        for known, key in self.names.items():
+            scores[key] = max(scores.get(key, 0.0), difflib.SequenceMatcher(None, norm, known).ratio())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < self.FUZZY_CUTOFF:
+            return None
+        if len(ranked) > 1 and ranked[1][1] > ranked[0][1] - self.FUZZY_MARGIN:
+            return None
+        return ranked[0][0]
+
+
+def owner_ids(team) -> list:
+    """ESPN member ids of a team's owners (espn_api gives member dicts)."""
+    return [o["id"] if isinstance(o, dict) else o for o in getattr(team, "owners", None) or []]
+
+
+# --- Records ---
+class TeamRecord:
+    """Integer W-L-T record; only rendered as a "W-L-T" string when the JSON is written."""
+
+    __slots__ = ("wins", "losses", "ties")
+
+    def __init__(self, wins: int = 0, losses: int = 0, ties: int = 0):
+        self.wins, self.losses, self.ties = wins, losses, ties
+
+    @classmethod
+    def parse(cls, s) -> "TeamRecord":
+        """Parse a "W-L-T" string (missing parts count as 0)."""
+        if isinstance(s, TeamRecord):
+            return s
+        nums = [int(n) for n in re.findall(r'\d+', str(s))]
+        return cls(*(nums + [0, 0, 0])[:3])
+
+    def __add__(self, other: "TeamRecord") -> "TeamRecord":
+        return TeamRecord(self.wins + other.wins, self.losses + other.losses, self.ties + other.ties)
+
+    def __iter__(self):
+        return iter((self.wins, self.losses, self.ties))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TeamRecord) and tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return f"TeamRecord({self.wins}, {self.losses}, {self.ties})"
+
+    def __str__(self) -> str:
+        return f"{self.wins}-{self.losses}-{self.ties}"
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.ties
+
+    @property
+    def win_pct(self) -> float:
+        return (self.wins + 0.5 * self.ties) / self.games if self.games else 0.0
+
+
+def encode_json(obj):
+    """json.dump default= hook: records are written as "W-L-T" strings."""
+    if isinstance(obj, TeamRecord):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# --- Median W/L Record ---
+# Last week that earns a median win/loss (week 1 comes from the Week 1 results overlay)
+LAST_MEDIAN_WEEK = 13
+
+
+def median_weeks(l: League, first_week: int = 2) -> range:
+    """
+    Weeks that count toward the median record: first_week through the current week, at
+    most through LAST_MEDIAN_WEEK and the season's last regular-season week. The
+    configured season starts at week 2 (its week 1 comes from the Week 1 results
+    overlay); past seasons start at week 1.
+    """
+    return range(first_week, min(l.current_week, LAST_MEDIAN_WEEK, l.settings.reg_season_count) + 1)
+
+
+def median_score(scores) -> float:
+    scores = sorted(scores)
+    mid = len(scores) // 2
+    return (scores[mid - 1] + scores[mid]) / 2 if len(scores) % 2 == 0 else scores[mid]
+
+
+def week_median_results(entries: list) -> dict:
+    """Map team_id -> "W"/"L" against one week's median score, or {} if the week is unplayed."""
+    scores = [s for _, s in entries]
+
+    # Skip if no scores OR all scores are 0 (season not started or week unplayed)
+    if not scores or all(s == 0 for s in scores):
+        return {}
+
+    median = median_score(scores)
+
+    return {team_id: "W" if score >= median else "L" for team_id, score in entries if team_id is not None}
+
+
+def fold_median_results(l: League, weekly_results) -> dict:
+    """Sum per-week median results into {team_id: {"wins", "losses"}}."""
+    median_records = {t.team_id: {"wins": 0, "losses": 0} for t in l.teams}
+    for results in weekly_results:
+        for team_id, result in results.items():
+            if result == "W":
+                median_records[team_id]["wins"] += 1
+            elif result == "L":
+                median_records[team_id]["losses"] += 1
+    return median_records
+
+
+def get_median_records(l: League, cache: ScoreStore = None, weekly_scores: dict = None, **fetch_kwargs) -> dict:
+    """Calculate win/loss vs median score each week (from week 2 onward)."""
+    if weekly_scores is None:
+        weekly_scores = load_weekly_scores(l, median_weeks(l), cache, **fetch_kwargs)
+    return fold_median_results(l, (week_median_results(entries) for entries in weekly_scores.values()))
+
+
+# --- All-Play Record ---
+def score_matrix(l: League, weekly_scores: dict, store: ScoreStore = None):
+    """
+    Build the weeks x teams score matrix once (NaN where a team has no score).
+
+    Only weeks that count toward the median are kept, and a team's score is only used
+    once its matchup for that week is decided. Weeks held in store are gathered from
+    its memmap in one copy (every matchup in them is decided). Returns (weeks, matrix);
+    columns follow l.teams.
+    """
+    index = {t.team_id: i for i, t in enumerate(l.teams)}
+    weeks = [w for w, entries in weekly_scores.items() if week_median_results(entries)]
+    matrix = np.full((len(weeks), len(l.teams)), np.nan)
+
+    stored = [row for row, week in enumerate(weeks) if store is not None and store.has(week)]
+    if stored:
+        store.copy_into(matrix, stored, [weeks[row] for row in stored], list(index))
+    for row, week in enumerate(weeks):
+        if row in stored:
+            continue
+        idx = matchup_period(l, week) - 1
+        for team_id, score in weekly_scores[week]:
+            i = index.get(team_id)
+            if i is not None and idx < len(l.teams[i].outcomes) and l.teams[i].outcomes[idx] != "U":
+                matrix[row, i] = score
+    return weeks, matrix
+
+
+def all_play_records(l: League, weekly_scores: dict, store: ScoreStore = None) -> dict:
+    """
+    Each team's record had it played every other team every week.
+
+    Returns {team_id: (TeamRecord, expected_wins, actual_wins)}. Expected wins is the
+    sum of the weekly all-play win share (ties count half); actual wins are matchup
+    wins over the same weeks.
+    """
+    weeks, matrix = score_matrix(l, weekly_scores, store)
+    wins = np.zeros(len(l.teams), dtype=np.int64)
+    losses = np.zeros_like(wins)
+    ties = np.zeros_like(wins)
+    expected = np.zeros(len(l.teams))
+
+    for row in matrix:
+        played = ~np.isnan(row)
+        scores = row[played]
+        ranked = np.sort(scores)
+        below = np.searchsorted(ranked, scores, side="left")
+        not_above = np.searchsorted(ranked, scores, side="right")
+        opponents = scores.size - 1
+        wins[played] += below
+        ties[played] += not_above - below - 1
+        losses[played] += scores.size - not_above
+        if opponents:
+            expected[played] += (below + 0.5 * (not_above - below - 1)) / opponents
+
+    actual = np.zeros(len(l.teams))
+    for week in weeks:
+        idx = matchup_period(l, week) - 1
+        for i, t in enumerate(l.teams):
+            outcome = t.outcomes[idx] if idx < len(t.outcomes) else "U"
+            actual[i] += {"W": 1.0, "T": 0.5}.get(outcome, 0.0)
+
+    return {
+        t.team_id: (TeamRecord(int(wins[i]), int(losses[i]), int(ties[i])), float(expected[i]), float(actual[i]))
+        for i, t in enumerate(l.teams)
+    }
+
+
+def add_all_play(teams_data: list, l: League, all_play: dict):
+    """Add the "All-Play Record", "Expected Wins" and "Luck" (actual - expected) columns."""
+    for row, t in zip(teams_data, l.teams):
+        record, expected, actual = all_play[t.team_id]
+        row["All-Play Record"] = record
+        row["Expected Wins"] = round(expected, 2)
+        row["Luck"] = round(actual - expected, 2)
+
+
+# --- Team Data ---
+def collect_team_data(l: League, median_records: dict) -> list:
+    first_place_wins = max(t.wins for t in l.teams)
+    teams_data = []
+
+    for t in l.teams:
+        wl_record = TeamRecord(t.wins, t.losses, t.ties)
+        median_record = TeamRecord(median_records[t.team_id]["wins"], median_records[t.team_id]["losses"])
+
+        teams_data.append({
+            "Rank": t.standing,
+            "Team": t.team_name,
+            "Overall Record": wl_record + median_record,
+            "Matchup Record": wl_record,
+            "Median Score Record": median_record,
+            "GB": "-" if t.wins == first_place_wins else first_place_wins - t.wins,
+            "PF": round(t.points_for, 2),
+            "PA": round(t.points_against, 2),
+            "Acquisition Budget": 100 - t.acquisition_budget_spent,
+            "Team Logo": t.logo_url
+            # Win % calculated later
+        })
+
+    return teams_data
+
+
+# --- Manual Adjustments ---
+RECORD_FIELDS = ("Overall Record", "Matchup Record", "Median Score Record")
+
+
+class Overlay:
+    """
+    One adjustments file: per-team changes from a single source (Week 1 results,
+    commissioner override, stat correction, replayed week, ...).
+
+    Either a plain list of team rows (the Week 1 results format, added to ESPN's
+    numbers, week 1) or {"name", "week", "mode": "add" | "set", "fuzzy", "teams": [...]}
+    where "week" is required. Each team row is resolved through the league's TeamIndex:
+    "team_id", "owner" (ESPN member id) or "Team" name, whichever it has; every other
+    key is a field to adjust. Names must match exactly (ignoring case and spacing)
+    unless the file sets "fuzzy": true.
+    """
+
+    def __init__(self, path: Path):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {"week": 1, "teams": data}
+        if "week" not in data:
+            raise ValueError(f"{path}: adjustments file has no \"week\"")
+        self.path = Path(path)
+        self.name = data.get("name", self.path.name)
+        self.week = data["week"]
+        self.mode = data.get("mode", "add")
+        self.fuzzy = bool(data.get("fuzzy", False))
+        self.entries = []
+        for row in data.get("teams", []):
+            fields = {k: v for k, v in row.items() if k not in ("team_id", "Team", "owner")}
+            for field in RECORD_FIELDS:
+                if field in fields:
+                    fields[field] = TeamRecord.parse(fields[field])
+            self.entries.append({
+                "team_id": row.get("team_id"), "name": row.get("Team"), "owner": row.get("owner"), "fields": fields
+            })
+
+
+def load_overlays(paths) -> list:
+    """Overlays from files and directories (every *.json inside), ordered by week."""
+    files = []
+    for path in map(Path, paths or ()):
+        files.extend(sorted(path.glob("*.json")) if path.is_dir() else [path])
+    return sorted((Overlay(f) for f in files), key=lambda o: o.week)
+
+
+def _adjusted(value, change, mode: str):
+    if mode == "set" or value is None:
+        return change
+    if isinstance(value, TeamRecord):
+        return value + change
+    if isinstance(value, int) and isinstance(change, int):
+        return value + change
+    if isinstance(value, (int, float)):
+        return round(to_float(value) + to_float(change), 2)
+    return change
+
+
+def apply_adjustments(teams_data: list, index: "TeamIndex", overlays: list, audit: list = None):
+    """
+    Apply every overlay in one pass over the teams (rows in index.team_ids order).
+
+    Each overlay row is resolved to a team once through the index; a team's changes
+    are applied in overlay order. Each field change is appended to audit, and rows
+    that resolve to no team are reported and skipped. Fuzzy name matches (overlays
+    with "fuzzy": true) are only tried for rows with no exact match, are reported, and
+    are skipped when their team already has a row in the same overlay. A row changing
+    "Matchup Record" or "Median Score Record" but not "Overall Record" has the overall
+    record recomputed as their sum, so the three stay consistent.
+    """
+    names = {team_id: team["Team"] for team, team_id in zip(teams_data, index.team_ids)}
+    changes = {}
+    for overlay in overlays:
+        resolved = [index.resolve(e["team_id"], e["name"], e["owner"]) for e in overlay.entries]
+        matched = {team_id for team_id, _ in resolved if team_id is not None}
+        for i, entry in enumerate(overlay.entries):
+            if resolved[i][0] is not None or not (overlay.fuzzy and entry["name"]):
+                continue
+            team_id, matched_by = index.resolve(name=entry["name"], fuzzy=True)
+            if team_id in matched:
+                print(f"[WARN] {overlay.name}: {entry['name']!r} is closest to {names.get(team_id)!r}, "
+                      f"which another row already adjusts; skipped")
+                resolved[i] = (None, "skipped")
+            elif team_id is not None:
+                print(f"[WARN] {overlay.name}: {entry['name']!r} fuzzy-matched to {names.get(team_id)!r}")
+                matched.add(team_id)
+                resolved[i] = (team_id, matched_by)
+
+        for entry, (team_id, matched_by) in zip(overlay.entries, resolved):
+            if team_id is None:
+                if matched_by != "skipped":
+                    ref = entry["team_id"] if entry["team_id"] is not None else entry["owner"] or entry["name"]
+                    print(f"[WARN] {overlay.name}: no team matches {ref!r}")
+                continue
+            changes.setdefault(team_id, []).append((overlay, entry, matched_by))
+
+    for team, team_id in zip(teams_data, index.team_ids):
+        for overlay, entry, matched_by in changes.get(team_id, ()):
+            updates = {field: _adjusted(team.get(field), change, overlay.mode) for field, change in entry["fields"].items()}
+            fields = entry["fields"]
+            if "Overall Record" not in fields and ("Matchup Record" in fields or "Median Score Record" in fields):
+                updates["Overall Record"] = (
+                    updates.get("Matchup Record", team.get("Matchup Record"))
+                    + updates.get("Median Score Record", team.get("Median Score Record"))
+                )
+            for field, after in updates.items():
+                before = team.get(field)
+                team[field] = after
+                if audit is not None:
+                    audit.append({
+                        "Overlay": overlay.name, "Week": overlay.week, "Team": team["Team"], "Team ID": team_id,
+                        "Matched By": matched_by, "Field": field, "Before": before, "After": after,
+                    })
+
+
+def add_win_pct(teams_data: list):
+    for team in teams_data:
+        team["Win %"] = round(team["Overall Record"].win_pct, 2)
+
+
+def add_games_back(teams_data: list):
+    leader = max(
+        teams_data,
+        key=lambda x: (x["Overall Record"].wins, x["PF"], -x["Overall Record"].losses)
+    )
+    lw, ll, _ = leader["Overall Record"]
+
+    for t in teams_data:
+        w, l, _ = t["Overall Record"]
+        t["GB"] = 0 if t is leader else round(((lw - w) + (l - ll)) / 2, 1)
+
+
+# --- Ranking ---
+# A tiebreak chain is a sequence of names from TIEBREAKERS. Teams are sorted by the
+# first tiebreaker; any teams still level are separated by the next one, and so on.
+# Teams tied on the whole chain keep their input order.
+#
+#   "wins"        - overall wins (matchup + median)
+#   "pf"          - points for
+#   "h2h"         - matchup wins against the other teams in the tied group
+#   "median_wins" - wins against the weekly median
+#
+# Each tiebreaker is called as fn(team, tied_group, context) and higher keys rank first.
+# context["team_ids"] maps id(row) -> team_id and context["h2h"] maps
+# (team_id, opponent_id) -> wins; both are only needed for "h2h".
+def _h2h_wins(team: dict, group: list, context: dict) -> int:
+    team_ids, h2h = context["team_ids"], context["h2h"]
+    me = team_ids[id(team)]
+    return sum(h2h.get((me, team_ids[id(other)]), 0) for other in group if other is not team)
+
+
+TIEBREAKERS = {
+    "wins": lambda team, group, context: team["Overall Record"].wins,
+    "pf": lambda team, group, context: team["PF"],
+    "h2h": _h2h_wins,
+    "median_wins": lambda team, group, context: team["Median Score Record"].wins,
+}
+
+DEFAULT_TIEBREAKS = ("wins", "pf")
+
+
+def head_to_head_wins(l: League) -> dict:
+    """Matchup wins by (team_id, opponent_id) from the league schedule."""
+    h2h = {}
+    for t in l.teams:
+        for opponent, outcome in zip(t.schedule, t.outcomes):
+            if outcome == "W" and opponent is not t:
+                key = (t.team_id, opponent.team_id)
+                h2h[key] = h2h.get(key, 0) + 1
+    return h2h
+
+
+def order_teams(teams: list, tiebreaks=DEFAULT_TIEBREAKS, context: dict = None) -> list:
+    """Order teams best-first by a tiebreak chain (see TIEBREAKERS)."""
+    if len(teams) <= 1 or not tiebreaks:
+        return list(teams)
+
+    tiebreak, rest = TIEBREAKERS[tiebreaks[0]], tiebreaks[1:]
+    keys = {id(t): tiebreak(t, teams, context) for t in teams}
+    ordered = sorted(teams, key=lambda t: keys[id(t)], reverse=True)
+
+    result, start = [], 0
+    for i in range(1, len(ordered) + 1):
+        if i == len(ordered) or keys[id(ordered[i])] != keys[id(ordered[start])]:
+            group = ordered[start:i]
+            result.extend(order_teams(group, rest, context) if len(group) > 1 else group)
+            start = i
+    return result
+
+
+def rank_teams(teams_data: list, tiebreaks=DEFAULT_TIEBREAKS, context: dict = None):
+    """Set each row's "Rank" in a single pass over the ordered rows."""
+    for i, t in enumerate(order_teams(teams_data, tiebreaks, context), 1):
+        t["Rank"] = i
+
+
+def build_teams_data(l: League, median_records: dict, overlays: list = (), tiebreaks=DEFAULT_TIEBREAKS,
+                     audit: list = None) -> list:
+    """Assemble the published standings rows: ESPN + median records, adjustments, win %, GB and rank."""
+    with instrument.stage("collect"):
+        teams_data = collect_team_data(l, median_records)
+    with instrument.stage("adjustments"):
+        apply_adjustments(teams_data, TeamIndex.from_league(l), overlays, audit)
+    with instrument.stage("win_pct"):
+        add_win_pct(teams_data)
+    with instrument.stage("games_back"):
+        add_games_back(teams_data)
+
+    with instrument.stage("rank"):
+        context = None
+        if "h2h" in tiebreaks:
+            context = {
+                "team_ids": {id(row): t.team_id for row, t in zip(teams_data, l.teams)},
+                "h2h": head_to_head_wins(l),
+            }
+        rank_teams(teams_data, tiebreaks, context)
+    return teams_data
+
+
+def dumps_teams(teams_data: list) -> str:
+    return json.dumps(teams_data, indent=2, default=encode_json)
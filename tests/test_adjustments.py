@@ -0,0 +1,62 @@
+import json
+from standings import TeamIndex, TeamRecord, load_overlays, apply_adjustments
+
+
+def make_league(n: int = 12):
+    index, teams_data = TeamIndex(), []
+    for team_id in range(1, n + 1):
+        index.add(team_id, f"Team {team_id}")
+        teams_data.append({
+            "Team": f"Team {team_id}",
+            "Overall Record": TeamRecord(5, 7), "Matchup Record": TeamRecord(3, 3),
+            "Median Score Record": TeamRecord(2, 4), "PF": 500.0,
+        })
+    return index, teams_data
+
+
+def write_overlay(tmp_path, data, name="overlay.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(data))
+    return load_overlays([path])
+
+
+def test_unknown_team_is_not_applied_to_a_similar_name(tmp_path, capsys):
+    index, teams_data = make_league()
+    overlays = write_overlay(tmp_path, [
+        {"Team": "Team 3", "Matchup Record": "1-0-0", "PF": 100.0},
+        {"Team": "Team 13", "Matchup Record": "1-0-0", "PF": 157.19},
+    ])
+    apply_adjustments(teams_data, index, overlays)
+
+    assert teams_data[2]["PF"] == 600.0
+    assert teams_data[2]["Matchup Record"] == TeamRecord(4, 3)
+    assert all(team["PF"] == 500.0 for i, team in enumerate(teams_data) if i != 2)
+    assert "no team matches 'Team 13'" in capsys.readouterr().out
+
+
+def test_fuzzy_match_is_opt_in_and_never_doubles_a_team(tmp_path, capsys):
+    index, teams_data = make_league()
+    overlays = write_overlay(tmp_path, {"week": 1, "fuzzy": True, "teams": [
+        {"Team": "Team 3", "PF": 100.0},
+        {"Team": "Team 13", "PF": 157.19},
+        {"Team": "Tem 5", "PF": 10.0},
+    ]})
+    apply_adjustments(teams_data, index, overlays)
+
+    assert teams_data[2]["PF"] == 600.0
+    assert teams_data[4]["PF"] == 510.0
+    out = capsys.readouterr().out
+    assert "'Tem 5' fuzzy-matched to 'Team 5'" in out
+    assert "no team matches 'Team 13'" in out
+
+
+def test_fuzzy_match_skips_a_team_already_in_the_overlay(tmp_path, capsys):
+    index, teams_data = make_league()
+    overlays = write_overlay(tmp_path, {"week": 1, "fuzzy": True, "teams": [
+        {"Team": "Team 5", "PF": 100.0},
+        {"Team": "Tem 5", "PF": 10.0},
+    ]})
+    apply_adjustments(teams_data, index, overlays)
+
+    assert teams_data[4]["PF"] == 600.0
+    assert "already adjusts; skipped" in capsys.readouterr().out